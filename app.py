@@ -1,4 +1,6 @@
-from flask import Flask, render_template, request, send_file, jsonify, send_from_directory
+import time
+APP_START = time.perf_counter()  # Startup breakdown (see /api/ready)
+from flask import Flask, render_template, request, send_file, jsonify, send_from_directory, Response
 import os
 from dotenv import load_dotenv
 
@@ -6,11 +8,13 @@ load_dotenv() # Load variables from .env
 
 import uuid
 import csv
-import threading
 import logging
 import json
-import time
-from processor import SITAProcessor
+import hashlib
+import multiprocessing
+from model_loader import ProcessorLoader, os_threading
+from job_queue import JobScheduler, remove_job_input
+from job_worker import WorkerPool
 from flask_cors import CORS
 import shutil
 
@@ -45,6 +49,12 @@ os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['DOWNLOAD_FOLDER'] = DOWNLOAD_FOLDER
 
+# Result Cache: identical uploads (same bytes, same processing signature) reuse the finished outputs.
+# Entries live as long as their files in DOWNLOAD_FOLDER; least recently used results are deleted
+# once the folder grows past RESULT_CACHE_MAX_MB (0 = no limit).
+RESULT_CACHE_ENABLED = os.getenv("SITA_RESULT_CACHE", "1") == "1"
+RESULT_CACHE_MAX_MB = int(os.getenv("SITA_RESULT_CACHE_MAX_MB", "5120"))
+
 def cleanup_temp_folders():
     """Purges upload and download directories on startup."""
     for folder in [UPLOAD_FOLDER, DOWNLOAD_FOLDER]:
@@ -62,45 +72,59 @@ def cleanup_temp_folders():
         else:
             os.makedirs(folder, exist_ok=True)
 
-# Cleanup on load
-cleanup_temp_folders()
-
-# Initialize Processor
-processor = SITAProcessor()
-
-# Global Job State
-job_lock = threading.Lock()
-current_job = {
-    "status": "idle",
-    "counters": {"total": 0, "cars": 0, "bikes": 0, "trucks": 0},
-    "id": None,
-    "video_link": None,
-    "csv_link": None,
-    "error": None
-}
-
-def load_persisted_job():
-    global current_job
+# Only the serving process cleans up, restores jobs and starts the workers. Not a worker process:
+# under `python app.py` each spawned worker re-imports this module as __mp_main__. Not the debug
+# reloader's watcher process either (the server itself runs in its child, with WERKZEUG_RUN_MAIN set).
+SERVING_PROCESS = __name__ != '__mp_main__' and multiprocessing.parent_process() is None and not (
+    __name__ == '__main__' and os.environ.get("WERKZEUG_RUN_MAIN") != "true")
+
+# Cleanup on load is opt-in: downloads/ holds the result cache, and purging it on every
+# autoscaled cold start throws that away. Uploads are deleted as soon as their job is final.
+if SERVING_PROCESS and os.getenv("SITA_CLEAN_ON_BOOT", "0") == "1":
+    cleanup_temp_folders()
+
+# Processing Workers
+# PERFORMANCE: Models load in the background; the server answers (auth, status) meanwhile
+# and uploads get a 503 + Retry-After until /api/ready reports ready.
+# Concurrent processing jobs; each worker loads its own models (memory scales with this)
+JOB_WORKERS = int(os.getenv("SITA_JOB_WORKERS", "1"))
+# "process": workers are separate processes (no CPU-bound work in the eventlet web process);
+# "thread": worker threads inside the web process
+WORKER_MODE = os.getenv("SITA_WORKER_MODE", "process")
+UPLOAD_RETRY_AFTER = 5
+
+# Job State: the jobs table is the queue and the record; live_jobs holds the in-flight jobs'
+# latest counters (the table is only written every few seconds while a job runs)
+# Real OS lock: worker events arrive on OS threads, not eventlet green threads
+job_lock = os_threading.Lock()
+live_jobs = {}
+job_versions = {}   # job_id -> number of updates of its live state (SSE streams send only when it moves)
+JOB_FIELDS = ("id", "status", "counters", "video_link", "csv_link", "error")
+FINAL_STATUSES = ("complete", "error", "interrupted")
+# PERFORMANCE: Job progress over Server-Sent Events. Each stream looks at its job every SSE_INTERVAL
+# seconds and sends at most one event, so bursts of counts are coalesced (<= 1 / SSE_INTERVAL events/s)
+SSE_INTERVAL = float(os.getenv("SITA_SSE_INTERVAL", "0.25"))
+SSE_HEARTBEAT = 15
+
+# Jobs that were processing when the server stopped resume from their last checkpoint (see checkpoint.py),
+# at most MAX_JOB_RESUMES times. With checkpoints off (SITA_CHECKPOINT_SECONDS=0) they are marked interrupted.
+RESUME_JOBS = float(os.getenv("SITA_CHECKPOINT_SECONDS", "60")) > 0
+MAX_JOB_RESUMES = 3
+
+def load_persisted_jobs():
     try:
-        last_job = database.get_latest_job()
-        if last_job:
-            print(f"DEBUG: Restoring job {last_job['id']} from DB")
-            with job_lock:
-                current_job["id"] = last_job['id']
-                current_job["counters"] = last_job['counters']
-                current_job["video_link"] = last_job['video_link']
-                current_job["csv_link"] = last_job['csv_link']
-                current_job["error"] = last_job['error']
-                
-                # If it was processing when we died, mark as interrupted or error
-                # unless we want to resume? (Resuming requires knowing exactly where we stopped in video... hard)
-                # Let's mark as stopped but keep data.
-                if last_job['status'] == 'processing':
-                    current_job["status"] = "interrupted" 
-                else:
-                    current_job["status"] = last_job['status']
+        # Queued jobs just run
+        if RESUME_JOBS:
+            resumed, interrupted = database.resume_running_jobs(MAX_JOB_RESUMES)
+        else:
+            resumed, interrupted = [], database.interrupt_running_jobs()
+        for job_id in resumed:
+            print(f"DEBUG: Job {job_id} was interrupted by a restart, queued to resume from its checkpoint")
+        for job_id in interrupted:
+            print(f"DEBUG: Job {job_id} was interrupted by a restart")
+            remove_job_input((database.get_job(job_id) or {}).get("params"))
     except Exception as e:
-        print(f"DEBUG: Failed to restore job: {e}")
+        print(f"DEBUG: Failed to restore jobs: {e}")
 
 # --- Database & Auth ---
 import database
@@ -109,63 +133,106 @@ import random
 # Initialize DB
 # Initialize DB
 database.init_db()
-load_persisted_job()
+if SERVING_PROCESS: load_persisted_jobs()
 
-last_save_time = 0
+def update_progress(job_id, counters):
+    with job_lock:
+        if job_id in live_jobs:
+            live_jobs[job_id]["counters"] = dict(counters)
+            job_versions[job_id] = job_versions.get(job_id, 0) + 1
 
-def update_progress(counters):
-    global last_save_time
+def get_job_state(job_id):
+    """Public state of a job (live if in flight, else from the table), or None if unknown."""
     with job_lock:
-        current_job["counters"] = counters
-    
-    # Auto-Save Throttling (Save every 2 seconds max)
-    now = time.time()
-    if now - last_save_time > 2:
-        try:
-            if current_job["id"]:
-                database.update_job(current_job["id"], counters=counters)
-                last_save_time = now
-        except Exception as e:
-            print(f"Auto-save failed: {e}")
-
-def background_process(filepath, csv_path, video_path):
-    global current_job
-    try:
-        print(f"DEBUG: Starting Job for {filepath}")
+        job = dict(live_jobs[job_id]) if job_id in live_jobs else None
+    if job is None:
+        row = database.get_job(job_id)
+        if not row: return None
+        job = {k: row[k] for k in JOB_FIELDS}
+    if job["status"] == "queued":
+        job["queue_position"] = database.get_queue_position(job_id)
+    return job
+
+def can_view_job(job_id, email):
+    """A job is visible to its owner and to members of the owner's organization."""
+    job = database.get_job(job_id) if email else None
+    if not job or not job.get("owner_email"): return False
+    if job["owner_email"] == email: return True
+    requester, owner = database.get_user(email), database.get_user(job["owner_email"])
+    return bool(requester and owner and requester.get("organization_id")
+                and requester["organization_id"] == owner.get("organization_id"))
+
+def save_upload(file, path, chunk_size=1 << 20):
+    """Streams an upload to disk and returns its SHA-256, computed on the way (no second read)."""
+    digest = hashlib.sha256()
+    with open(path, 'wb') as f:
+        while True:
+            chunk = file.stream.read(chunk_size)
+            if not chunk: break
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+def result_cache_key(content_hash, scope, signature, roi=None):
+    # scope: the uploader's organization (or the user, outside one); results are never shared across scopes
+    signature = {"content": content_hash, "scope": scope, "roi": roi, **signature}
+    return hashlib.sha256(json.dumps(signature, sort_keys=True, default=str).encode()).hexdigest()
+
+def result_files(entry):
+    """Download-folder files belonging to a cached result (CSV, video, detection log)."""
+    names = [entry["csv_link"], entry["video_link"]]
+    if entry["csv_link"]:
+        names.append(os.path.splitext(entry["csv_link"])[0] + "_detections.npz")
+    return [os.path.join(app.config['DOWNLOAD_FOLDER'], n) for n in names if n]
+
+def lookup_cached_result(cache_key):
+    """Cache entry whose outputs are still on disk, or None. Entries whose files are gone are dropped."""
+    entry = database.get_cached_result(cache_key)
+    if not entry: return None
+    if not os.path.exists(os.path.join(app.config['DOWNLOAD_FOLDER'], entry["csv_link"])) or \
+       (entry["video_link"] and not os.path.exists(os.path.join(app.config['DOWNLOAD_FOLDER'], entry["video_link"]))):
+        database.delete_cached_result(cache_key)
+        return None
+    return entry
+
+def evict_cached_results(keep_key=None):
+    """Deletes least recently used cached results until DOWNLOAD_FOLDER fits RESULT_CACHE_MAX_MB."""
+    if RESULT_CACHE_MAX_MB <= 0: return
+    folder = app.config['DOWNLOAD_FOLDER']
+    used = sum(os.path.getsize(os.path.join(folder, n)) for n in os.listdir(folder) if os.path.isfile(os.path.join(folder, n)))
+    for entry in database.get_cached_results_lru():
+        if used <= RESULT_CACHE_MAX_MB * 1024 * 1024: break
+        if entry["cache_key"] == keep_key: continue
+        for path in result_files(entry):
+            if os.path.exists(path):
+                used -= os.path.getsize(path)
+                os.remove(path)
+        database.delete_cached_result(entry["cache_key"])
+        logger.info(f"Result cache: evicted {entry['csv_link']}")
+
+def handle_job_event(kind, job_id, data):
+    """Events from the processing workers (see job_queue / job_worker). The workers write the jobs table."""
+    if kind == "started":
         with job_lock:
-            current_job["status"] = "processing"
-            current_job["counters"] = {"total": 0, "cars": 0, "bikes": 0, "trucks": 0}
-            
-        # Create Job in DB
-        database.create_job(current_job["id"], "processing", current_job["counters"])
-        
-        final_counters = processor.process_video(filepath, csv_path, video_path, update_callback=update_progress)
-        
+            live_jobs[job_id] = {"id": job_id, "status": "processing", "counters": {"total": 0, "cars": 0, "bikes": 0, "trucks": 0},
+                                 "video_link": None, "csv_link": None, "error": None}
+            job_versions[job_id] = 1
+    elif kind == "progress":
+        update_progress(job_id, data)
+    elif kind == "finished":
+        # Final state is already in the table
         with job_lock:
-            current_job["counters"] = final_counters
-            current_job["status"] = "complete"
-            current_job["video_link"] = os.path.basename(video_path)
-            current_job["csv_link"] = os.path.basename(csv_path)
-            
-        # Final DB Update
-        database.update_job(
-            current_job["id"], 
-            status="complete", 
-            counters=final_counters,
-            video_link=os.path.basename(video_path),
-            csv_link=os.path.basename(csv_path)
-        )
-        
-    except Exception as e:
-        logger = logging.getLogger(__name__)
-        logger.error(f"Processing failed: {e}")
-        with job_lock:
-            current_job["status"] = "error"
-            current_job["error"] = str(e)
-            
-        # Error DB Update
-        if current_job["id"]:
-            database.update_job(current_job["id"], status="error", error=str(e))
+            live_jobs.pop(job_id, None)
+            job_versions.pop(job_id, None)
+        cache_key = ((database.get_job(job_id) or {}).get("params") or {}).get("cache_key")
+        if data.get("status") == "complete" and cache_key:
+            evict_cached_results(keep_key=cache_key)
+
+if WORKER_MODE == "thread":
+    job_engine = JobScheduler(ProcessorLoader(workers=JOB_WORKERS), handle_job_event, workers=JOB_WORKERS)
+else:
+    job_engine = WorkerPool(handle_job_event, workers=JOB_WORKERS)
+if SERVING_PROCESS: job_engine.start()
 
 # --- Auth Guard Decorator ---
 from functools import wraps
@@ -480,6 +547,43 @@ def get_my_org():
          
     return jsonify(org)
 
+@app.route('/api/org/roi', methods=['GET'])
+@require_role(['admin', 'user'])
+def list_camera_rois():
+    user = database.get_user(request.headers.get('X-User-Email'))
+    if not user.get('organization_id'):
+        return jsonify({"error": "No Organization found"}), 404
+    return jsonify(database.get_camera_rois(user['organization_id']))
+
+@app.route('/api/org/roi', methods=['POST'])
+@require_role(['admin'])
+def save_camera_roi():
+    """Sets a camera's ROI polygon: {"camera": "gate-1", "points": [[x, y], ...]} (fractions of the frame size)."""
+    from roi import normalize_polygon
+    requester_email = request.headers.get('X-User-Email')
+    user = database.get_user(requester_email)
+    if not user.get('organization_id'):
+        return jsonify({"error": "No Organization found"}), 404
+    data = request.json or {}
+    camera = data.get('camera') or 'default'
+    try:
+        points = normalize_polygon(data.get('points') or [])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    database.put_camera_roi(user['organization_id'], camera, points, requester_email)
+    database.log_activity(requester_email, "ROI_UPDATED", f"Camera {camera}: {len(points)} points", request.remote_addr)
+    return jsonify({"success": True, "camera": camera, "points": points})
+
+@app.route('/api/org/roi/<camera>', methods=['DELETE'])
+@require_role(['admin'])
+def delete_camera_roi(camera):
+    requester_email = request.headers.get('X-User-Email')
+    user = database.get_user(requester_email)
+    if not database.delete_camera_roi(user.get('organization_id'), camera):
+        return jsonify({"error": "ROI not found"}), 404
+    database.log_activity(requester_email, "ROI_DELETED", f"Camera {camera}", request.remote_addr)
+    return jsonify({"success": True})
+
 
 # --- Core Logic ---
 
@@ -488,8 +592,6 @@ def get_my_org():
 # User prompt: "Super Admin capabilities ... No access to Detection Dashboard"
 # So yes, strict block.
 def upload_video():
-    global current_job
-
     # Security: Check if user is approved
     # Decorator handles role check
     user_email = request.form.get('email') or request.headers.get('X-User-Email')
@@ -498,8 +600,24 @@ def upload_video():
     if not user or user.get('status') != 'verified':
          return {'error': 'Unauthorized: Access to SITA Intelligence Core is restricted.'}, 403
     
+    if not job_engine.ready:
+        status = job_engine.status()
+        message = f"Processing engine failed to load: {status['error']}" if status["state"] == "error" \
+            else "Processing engine is starting up. Retry shortly."
+        return {'error': message, 'state': status["state"], 'retry_after': UPLOAD_RETRY_AFTER}, 503, \
+            {'Retry-After': str(UPLOAD_RETRY_AFTER)}
+
     if 'video' not in request.files:
         return {'error': 'No file part'}, 400
+
+    # Per-job detector precision (default: SITA_DETECTOR_PRECISION)
+    precision = request.form.get('precision') or None
+    if precision not in (None, 'fp32', 'int8'):
+        return {'error': f"Unknown precision '{precision}' (expected fp32 or int8)"}, 400
+
+    # Region of interest of the uploading camera (per organization, see /api/org/roi)
+    camera = request.form.get('camera') or 'default'
+    roi = database.get_camera_roi(user['organization_id'], camera) if user.get('organization_id') else None
     
     file = request.files['video']
     if file.filename == '':
@@ -511,7 +629,19 @@ def upload_video():
         job_id = str(uuid.uuid4())
         filename = job_id + "_" + file.filename
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # PERFORMANCE: Hash while streaming to disk, then skip processing if this exact clip was already done
+        content_hash = save_upload(file, filepath)
+        scope = user.get('organization_id') or user_email
+        signature = job_engine.signature(precision)
+        cache_key = result_cache_key(content_hash, scope, signature, roi) if RESULT_CACHE_ENABLED else None
+        cached = lookup_cached_result(cache_key) if cache_key else None
+        if cached:
+            os.remove(filepath)
+            logger.info(f"Result cache hit for {file.filename} ({content_hash[:12]})")
+            database.create_job(job_id, "complete", cached["counters"], owner_email=user_email)
+            database.update_job(job_id, video_link=cached["video_link"], csv_link=cached["csv_link"])
+            return {"success": True, "message": "Cached result", "job_id": job_id, "cached": True,
+                    "video_link": cached["video_link"], "csv_link": cached["csv_link"]}
         
         # Paths
         csv_filename = os.path.splitext(filename)[0] + '.csv'
@@ -520,39 +650,119 @@ def upload_video():
         video_filename = os.path.splitext(filename)[0] + '_processed.webm'
         video_path = os.path.join(app.config['DOWNLOAD_FOLDER'], video_filename)
         
-        # Reset Job State
-        with job_lock:
-            current_job = {
-                "status": "starting",
-                "id": job_id,
-                "counters": {"total": 0, "cars": 0, "bikes": 0, "trucks": 0},
-                "video_link": None,
-                "csv_link": None,
-                "error": None
-            }
-
-        # Start Thread
-        thread = threading.Thread(target=background_process, args=(filepath, csv_path, video_path))
-        thread.start()
+        # Queue the job (persisted, so it survives a restart) and wake a worker
+        params = {"filepath": filepath, "csv_path": csv_path, "video_path": video_path, "cache_key": cache_key,
+                  "content_hash": content_hash, "precision": precision, "roi": roi, "detector": signature["backend"]}
+        database.create_job(job_id, "queued", {"total": 0, "cars": 0, "bikes": 0, "trucks": 0}, params=params,
+                            owner_email=user_email)
+        job_engine.notify()
         
-        return {"success": True, "message": "Processing started", "job_id": job_id}
+        return {"success": True, "message": "Processing queued", "job_id": job_id,
+                "queue_position": database.get_queue_position(job_id)}
+
+@app.route('/api/ready', methods=['GET'])
+def get_ready():
+    """Readiness probe: 200 once the models are loaded and warmed up, 503 before. Includes the startup breakdown."""
+    status = job_engine.status()
+    status["startup"] = {"app_import": APP_IMPORT_SECONDS, **status["startup"]}
+    return jsonify(status), (200 if status["ready"] else 503)
 
 @app.route('/api/status', methods=['GET'])
 # Status is public-ish for the dashboard, but maybe restrict?
 # Let's leave it open or simple check.
 def get_status():
-    with job_lock:
-        return jsonify(current_job)
+    # ?job_id=... for a specific job; without it, the caller's latest job (compatibility with old dashboards)
+    job_id = request.args.get('job_id')
+    owner = request.headers.get('X-User-Email') or request.args.get('email')
+    if job_id:
+        # Someone else's job is reported as not found, like an unknown one
+        job = get_job_state(job_id) if can_view_job(job_id, owner) else None
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job)
+    # No identity, no job: an anonymous caller gets the idle placeholder, never someone else's latest job
+    latest = database.get_latest_job(owner_email=owner) if owner else None
+    if not latest or not can_view_job(latest["id"], owner):
+        return jsonify({"status": "idle", "id": None, "counters": {"total": 0, "cars": 0, "bikes": 0, "trucks": 0},
+                        "video_link": None, "csv_link": None, "error": None})
+    return jsonify(get_job_state(latest["id"]))
+
+def sse_event(kind, data):
+    return f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+
+def job_event_stream(job_id):
+    """
+    SSE stream of one job: a `state` event (the /api/status body), then `progress` events with the counters
+    that changed since the last event (`counters`) and the change of the vehicle counts (`delta`),
+    `state` again when the queue position or status changes, and a final `done` event with the full
+    state (complete, error or interrupted), after which the stream ends. ('error' is taken by EventSource.)
+    """
+    state = get_job_state(job_id)
+    yield sse_event("done" if state["status"] in FINAL_STATUSES else "state", state)
+    sent = dict(state["counters"] or {})
+    seen_version, was_live = None, False
+    last_db = last_sent = time.monotonic()
+    while state["status"] not in FINAL_STATUSES:
+        time.sleep(SSE_INTERVAL)
+        now = time.monotonic()
+        with job_lock:
+            version = job_versions.get(job_id)
+            counters = dict(live_jobs[job_id]["counters"]) if version is not None and version != seen_version else None
+        if version is not None:
+            was_live = True
+            if counters is not None:
+                seen_version = version
+                if state["status"] != "processing":
+                    state = {**state, "status": "processing"}
+                    state.pop("queue_position", None)
+                    yield sse_event("state", state)
+                changed = {k: v for k, v in counters.items() if sent.get(k) != v}
+                if changed:
+                    delta = {k: v - sent.get(k, 0) for k, v in changed.items() if k in ("total", "cars", "bikes", "trucks")}
+                    sent.update(changed)
+                    yield sse_event("progress", {"counters": changed, "delta": delta})
+                    last_sent = now
+        elif was_live or now - last_db >= 2:
+            # Not in flight here: queued, claimed but not started yet, or just finished (final state is in the table)
+            was_live, last_db = False, now
+            job = get_job_state(job_id) or {**state, "status": "error", "error": "Job not found"}
+            if job["status"] in FINAL_STATUSES:
+                yield sse_event("done", job)
+                return
+            if job["status"] != state["status"] or job.get("queue_position") != state.get("queue_position"):
+                state = job
+                yield sse_event("state", state)
+                last_sent = now
+        if now - last_sent >= SSE_HEARTBEAT:
+            # Comment line: keeps proxies from closing an idle stream
+            yield ": keepalive\n\n"
+            last_sent = now
+
+@app.route('/api/status/stream', methods=['GET'])
+def stream_status():
+    """Server-Sent Events for one job (?job_id=...&email=..., EventSource cannot send headers). See job_event_stream."""
+    job_id = request.args.get('job_id')
+    email = request.headers.get('X-User-Email') or request.args.get('email')
+    if not job_id or not can_view_job(job_id, email) or get_job_state(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    return Response(job_event_stream(job_id), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route('/api/traffic_report', methods=['GET'])
 # Report is definitely sensitive.
 @require_role(['user', 'admin']) 
 def get_report():
-    # Returns the JSON data of the COMPLETED job
-    if not current_job["csv_link"]:
+    # Returns the JSON data of the COMPLETED job (?job_id=..., default: the caller's latest completed job)
+    job_id = request.args.get('job_id')
+    if job_id:
+        job = database.get_job(job_id) if can_view_job(job_id, request.headers.get('X-User-Email')) else None
+    else:
+        email = request.headers.get('X-User-Email')
+        job = database.get_latest_job(owner_email=email, status="complete") if email else None
+    if not job or not job["csv_link"]:
         return {"data": []}
     
-    csv_path = os.path.join(app.config['DOWNLOAD_FOLDER'], current_job["csv_link"])
+    csv_path = os.path.join(app.config['DOWNLOAD_FOLDER'], job["csv_link"])
     rows = []
     if os.path.exists(csv_path):
         with open(csv_path, 'r') as f:
@@ -690,6 +900,9 @@ def verify_mobile_otp():
             
     return jsonify({'error': 'Invalid OTP Code'}), 400
 
+APP_IMPORT_SECONDS = round(time.perf_counter() - APP_START, 2)
+logger.info(f"App imported in {APP_IMPORT_SECONDS}s (models loading in background)")
+
 if __name__ == '__main__':
     print("Starting SITA VIVA-SAFE Server...")
     app.run(host='0.0.0.0', port=7860, debug=True)
@@ -0,0 +1,75 @@
+import os
+import time
+import cv2
+import numpy as np
+from vehicle_color import ColorClassifier
+
+# Per-crop latency of the color classifier: legacy inRange loop vs. the LUT classifier.
+# Also checks that both return the same label for every crop.
+
+def legacy_detect_color(crop):
+    """Pre-LUT SITAProcessor.detect_color, kept verbatim as the reference."""
+    if crop.size == 0: return "Blue"
+    h, w, _ = crop.shape
+    center = crop[int(h*0.2):int(h*0.75), int(w*0.25):int(w*0.75)]
+    if center.size == 0: return "Blue"
+    
+    hsv = cv2.cvtColor(center, cv2.COLOR_BGR2HSV)
+    ranges = {
+        "White": [((0, 0, 180), (180, 50, 255))],
+        "Black": [((0, 0, 0), (180, 255, 50))],
+        "Red":   [((0, 70, 50), (10, 255, 255)), ((170, 70, 50), (180, 255, 255))],
+        "Blue":  [((100, 150, 0), (140, 255, 255))],
+        "Gray":  [((0, 0, 50), (180, 50, 180))]
+    }
+    
+    best_color = "Blue"
+    max_pixels = 0
+    total = center.shape[0] * center.shape[1]
+    
+    for name, r_list in ranges.items():
+        count = 0
+        for (low, high) in r_list:
+            mask = cv2.inRange(hsv, np.array(low), np.array(high))
+            count += cv2.countNonZero(mask)
+        if count > max_pixels and (count/total) > 0.3:
+            max_pixels = count
+            best_color = name
+    return best_color
+
+def make_crops(n=500, seed=0):
+    """Vehicle-sized crops: a flat body color plus noise, at typical 1080p box sizes."""
+    rng = np.random.default_rng(seed)
+    crops = []
+    for _ in range(n):
+        h, w = rng.integers(40, 300), rng.integers(40, 400)
+        body = rng.integers(0, 256, 3)
+        crop = np.clip(body + rng.normal(0, 25, (h, w, 3)), 0, 255).astype(np.uint8)
+        crops.append(crop)
+    return crops
+
+def bench(fn, crops, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for crop in crops: fn(crop)
+        best = min(best, time.perf_counter() - t)
+    return best / len(crops) * 1e6
+
+if __name__ == "__main__":
+    t = time.perf_counter()
+    exact = ColorClassifier()
+    print(f"LUT build (once per processor): {(time.perf_counter() - t) * 1e3:.1f} ms")
+
+    classifier = ColorClassifier(max_pixels=int(os.getenv("SITA_COLOR_MAX_PIXELS", "0")) or 4096)
+
+    crops = make_crops()
+    for label, clf in [("LUT (every pixel)", exact), (f"LUT (<= {classifier.max_pixels} px)", classifier)]:
+        mismatches = sum(legacy_detect_color(c) != clf.classify(c) for c in crops)
+        print(f"Label agreement with legacy, {label}: {1 - mismatches / len(crops):.1%} ({mismatches}/{len(crops)} differ)")
+
+    legacy_us = bench(legacy_detect_color, crops)
+    print(f"Legacy inRange loop:        {legacy_us:8.1f} us/crop")
+    for label, clf in [("LUT, every pixel (default):", exact), ("LUT, sampled:", classifier)]:
+        lut_us = bench(clf.classify, crops)
+        print(f"{label:<27} {lut_us:8.1f} us/crop  ({legacy_us / lut_us:.1f}x)")
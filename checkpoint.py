@@ -0,0 +1,55 @@
+import os
+import pickle
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the checkpoint contents change
+CHECKPOINT_VERSION = 2
+
+def checkpoint_path(output_csv_path):
+    return os.path.splitext(output_csv_path)[0] + "_checkpoint.pkl"
+
+def save_checkpoint(path, state, video_parts=()):
+    """
+    Writes a job checkpoint: `state` (pickled bytes, see SITAProcessor.process_video) and the finished
+    video part files. Written to a temp file and renamed, so a crash never leaves a torn checkpoint.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump({"version": CHECKPOINT_VERSION, "state": state, "video_parts": list(video_parts)}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+def load_checkpoint(path):
+    """The checkpointed state dict (with its video_parts), or None if there is no usable checkpoint."""
+    if not os.path.exists(path): return None
+    try:
+        with open(path, "rb") as f:
+            saved = pickle.load(f)
+        if saved.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"version {saved.get('version')}")
+        state = pickle.loads(saved["state"])
+        state["video_parts"] = saved["video_parts"]
+        return state
+    except Exception as e:
+        logger.error(f"Ignoring checkpoint {path}: {e}")
+        return None
+
+def remove_checkpoint(path):
+    if os.path.exists(path): os.remove(path)
+
+def snapshot_trackers(model):
+    """ByteTrack state of the model's predictor (its trackers and the global track ID counter), pickled, or None."""
+    trackers = getattr(getattr(model, "predictor", None), "trackers", None)
+    if not trackers: return None
+    from ultralytics.trackers.basetrack import BaseTrack
+    return pickle.dumps((trackers, BaseTrack._count), protocol=pickle.HIGHEST_PROTOCOL)
+
+def restore_trackers(predictor, snapshot):
+    """Loads a snapshot_trackers() state into the predictor's live trackers (same objects, new state)."""
+    from ultralytics.trackers.basetrack import BaseTrack
+    trackers, count = pickle.loads(snapshot)
+    for tracker, saved in zip(predictor.trackers, trackers):
+        tracker.__dict__.update(saved.__dict__)
+    BaseTrack._count = count
@@ -80,10 +80,37 @@ def init_db():
             video_link TEXT,
             csv_link TEXT,
             error TEXT,
+            params TEXT,  -- JSON string: processing inputs of a queued job
+            owner_email TEXT,
             last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
 
+    # Result Cache (content hash + processing signature -> finished job outputs)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS result_cache (
+            cache_key TEXT PRIMARY KEY,
+            content_hash TEXT,
+            counters TEXT,  -- JSON string
+            video_link TEXT,
+            csv_link TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Camera ROIs (per organization; inference is restricted to the polygon)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS camera_rois (
+            organization_id INTEGER,
+            camera TEXT,
+            points TEXT,  -- JSON [[x, y], ...], fractions of the frame size
+            updated_by TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (organization_id, camera)
+        )
+    ''')
+
 
     # Migration: Add agent_id if missing (for existing installations)
     try:
@@ -113,6 +140,14 @@ def init_db():
         print("Migrating DB: Adding password column...")
         c.execute("ALTER TABLE users ADD COLUMN password TEXT DEFAULT NULL")
 
+    # Migration: Add job queue columns if missing
+    try:
+        c.execute("SELECT params, owner_email FROM jobs LIMIT 1")
+    except sqlite3.OperationalError:
+        print("Migrating DB: Adding job queue columns...")
+        c.execute("ALTER TABLE jobs ADD COLUMN params TEXT DEFAULT NULL")
+        c.execute("ALTER TABLE jobs ADD COLUMN owner_email TEXT DEFAULT NULL")
+
     conn.commit()
     conn.close()
     print("Database initialized.")
@@ -479,11 +514,11 @@ def verify_otp(email: str, code: str) -> bool:
 
 # --- Job Persistence ---
 
-def create_job(job_id, status, counters):
+def create_job(job_id, status, counters, params=None, owner_email=None):
     import json
     conn = get_db_connection()
-    conn.execute('INSERT INTO jobs (id, status, counters, last_updated) VALUES (?, ?, ?, CURRENT_TIMESTAMP)',
-                 (job_id, status, json.dumps(counters)))
+    conn.execute('INSERT INTO jobs (id, status, counters, params, owner_email, last_updated) VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)',
+                 (job_id, status, json.dumps(counters), json.dumps(params) if params is not None else None, owner_email))
     conn.commit()
     conn.close()
 
@@ -517,23 +552,167 @@ def update_job(job_id, status=None, counters=None, video_link=None, csv_link=Non
     conn.commit()
     conn.close()
 
-def get_latest_job():
+def _job_dict(job):
     import json
+    job_dict = dict(job)
+    try:
+        job_dict['counters'] = json.loads(job_dict['counters']) if job_dict['counters'] else {}
+    except:
+        job_dict['counters'] = {"total": 0, "cars": 0, "bikes": 0, "trucks": 0}
+    job_dict['params'] = json.loads(job_dict['params']) if job_dict.get('params') else None
+    return job_dict
+
+def get_job(job_id):
+    conn = get_db_connection()
+    job = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    conn.close()
+    return _job_dict(job) if job else None
+
+def get_latest_job(owner_email=None, status=None):
     conn = get_db_connection()
+    query = 'SELECT * FROM jobs WHERE 1 = 1'
+    params = []
+    if owner_email is not None:
+        query += ' AND owner_email = ?'
+        params.append(owner_email)
+    if status is not None:
+        query += ' AND status = ?'
+        params.append(status)
     # Check if table exists first (migration safety)
     try:
-        job = conn.execute('SELECT * FROM jobs ORDER BY last_updated DESC LIMIT 1').fetchone()
+        job = conn.execute(query + ' ORDER BY last_updated DESC, rowid DESC LIMIT 1', tuple(params)).fetchone()
     except sqlite3.OperationalError:
         return None
-        
+    finally:
+        conn.close()
+    return _job_dict(job) if job else None
+
+def claim_next_job():
+    """Oldest queued job, atomically switched to 'processing' (safe with several workers), or None."""
+    conn = get_db_connection()
+    conn.isolation_level = None
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        job = conn.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY rowid LIMIT 1").fetchone()
+        if job:
+            conn.execute("UPDATE jobs SET status = 'processing', last_updated = CURRENT_TIMESTAMP WHERE id = ?", (job['id'],))
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+    if not job: return None
+    job = _job_dict(job)
+    job['status'] = 'processing'
+    return job
+
+def get_queue_position(job_id):
+    """1-based position of a queued job (1 = next to run)."""
+    conn = get_db_connection()
+    row = conn.execute('''SELECT COUNT(*) AS ahead FROM jobs WHERE status = 'queued'
+                          AND rowid <= (SELECT rowid FROM jobs WHERE id = ?)''', (job_id,)).fetchone()
     conn.close()
-    
-    if job:
-        job_dict = dict(job)
-        if job_dict['counters']:
-            try:
-                job_dict['counters'] = json.loads(job_dict['counters'])
-            except:
-                job_dict['counters'] = {"total": 0, "cars": 0, "bikes": 0, "trucks": 0}
-        return job_dict
-    return None
+    return row['ahead']
+
+def interrupt_running_jobs():
+    """Jobs left 'processing' by a previous server process are marked 'interrupted'. Returns their ids."""
+    conn = get_db_connection()
+    ids = [r['id'] for r in conn.execute("SELECT id FROM jobs WHERE status = 'processing'").fetchall()]
+    conn.execute("UPDATE jobs SET status = 'interrupted', last_updated = CURRENT_TIMESTAMP WHERE status = 'processing'")
+    conn.commit()
+    conn.close()
+    return ids
+
+def resume_running_jobs(max_resumes=3):
+    """
+    Jobs left 'processing' by a previous server process go back to the queue (in their old place) with
+    params["resume"] set, so a worker continues them from their last checkpoint. A job that was already
+    resumed max_resumes times is marked 'interrupted' instead. Returns (resumed ids, interrupted ids).
+    """
+    import json
+    conn = get_db_connection()
+    resumed, interrupted = [], []
+    for row in conn.execute("SELECT id, params FROM jobs WHERE status = 'processing'").fetchall():
+        params = json.loads(row['params']) if row['params'] else None
+        if params is None or params.get("resumes", 0) >= max_resumes:
+            conn.execute("UPDATE jobs SET status = 'interrupted', last_updated = CURRENT_TIMESTAMP WHERE id = ?", (row['id'],))
+            interrupted.append(row['id'])
+            continue
+        params.update(resume=True, resumes=params.get("resumes", 0) + 1)
+        conn.execute("UPDATE jobs SET status = 'queued', params = ?, last_updated = CURRENT_TIMESTAMP WHERE id = ?",
+                     (json.dumps(params), row['id']))
+        resumed.append(row['id'])
+    conn.commit()
+    conn.close()
+    return resumed, interrupted
+
+def put_cached_result(cache_key, content_hash, counters, video_link, csv_link):
+    import json
+    conn = get_db_connection()
+    conn.execute('''INSERT OR REPLACE INTO result_cache (cache_key, content_hash, counters, video_link, csv_link, created_at, last_used)
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)''',
+                 (cache_key, content_hash, json.dumps(counters), video_link, csv_link))
+    conn.commit()
+    conn.close()
+
+def get_cached_result(cache_key):
+    """Cached outputs for cache_key (marked as used), or None."""
+    import json
+    conn = get_db_connection()
+    row = conn.execute('SELECT * FROM result_cache WHERE cache_key = ?', (cache_key,)).fetchone()
+    if row:
+        conn.execute('UPDATE result_cache SET last_used = CURRENT_TIMESTAMP WHERE cache_key = ?', (cache_key,))
+        conn.commit()
+    conn.close()
+    if not row: return None
+    entry = dict(row)
+    entry['counters'] = json.loads(entry['counters']) if entry['counters'] else {}
+    return entry
+
+def get_cached_results_lru():
+    """All cache entries, least recently used first."""
+    conn = get_db_connection()
+    rows = conn.execute('SELECT * FROM result_cache ORDER BY last_used ASC, created_at ASC').fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+def delete_cached_result(cache_key):
+    conn = get_db_connection()
+    conn.execute('DELETE FROM result_cache WHERE cache_key = ?', (cache_key,))
+    conn.commit()
+    conn.close()
+
+# --- Camera ROIs ---
+
+def put_camera_roi(org_id, camera, points, updated_by):
+    import json
+    conn = get_db_connection()
+    conn.execute('''INSERT OR REPLACE INTO camera_rois (organization_id, camera, points, updated_by, updated_at)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)''',
+                 (org_id, camera, json.dumps(points), updated_by))
+    conn.commit()
+    conn.close()
+
+def get_camera_roi(org_id, camera):
+    """ROI points for the organization's camera, falling back to its 'default' camera, or None."""
+    import json
+    conn = get_db_connection()
+    row = conn.execute('''SELECT points FROM camera_rois WHERE organization_id = ? AND camera IN (?, 'default')
+                          ORDER BY camera = 'default' LIMIT 1''', (org_id, camera)).fetchone()
+    conn.close()
+    return json.loads(row['points']) if row else None
+
+def get_camera_rois(org_id):
+    import json
+    conn = get_db_connection()
+    rows = conn.execute('SELECT * FROM camera_rois WHERE organization_id = ? ORDER BY camera', (org_id,)).fetchall()
+    conn.close()
+    return [{**dict(r), 'points': json.loads(r['points'])} for r in rows]
+
+def delete_camera_roi(org_id, camera) -> bool:
+    conn = get_db_connection()
+    deleted = conn.execute('DELETE FROM camera_rois WHERE organization_id = ? AND camera = ?', (org_id, camera)).rowcount
+    conn.commit()
+    conn.close()
+    return deleted > 0
@@ -0,0 +1,88 @@
+import json
+import numpy as np
+
+# Bumped when the array layout changes
+LOG_VERSION = 1
+
+class DetectionLogWriter:
+    """
+    Columnar log of one job's analysis frames, saved as a single .npz next to the CSV.
+    Frame i's detections are rows offsets[i]:offsets[i + 1] of boxes/ids/classes/confs.
+    Counted tracks are also logged with their color and plate results (those need pixels
+    and OCR, which re-analysis from the log alone cannot redo).
+    """
+    def __init__(self, path, **meta):
+        self.path = path
+        self.meta = dict(meta)
+        self._frames = []
+        self._counts = []
+        self._chunks = []   # (boxes, ids, classes, confs) per frame with detections
+        self._tracks = {}
+
+    def add_frame(self, frame_idx, detections):
+        """detections: (boxes, ids, clss, confs) as returned by the tracker, or None (nothing tracked)."""
+        self._frames.append(frame_idx)
+        if detections is None or len(detections[1]) == 0:
+            self._counts.append(0)
+            return
+        boxes, ids, clss, confs = detections
+        self._counts.append(len(ids))
+        self._chunks.append((boxes, ids, clss, confs))
+
+    def add_track(self, tid, v):
+        self._tracks[tid] = (v.seq, v.cls_id, v.color, v.best_plate, v.initial_plate, v.best_conf)
+
+    def save(self, last_frame):
+        def column(i, dtype, width=None):
+            if not self._chunks: return np.zeros((0, 4) if width else 0, dtype)
+            return np.concatenate([np.asarray(c[i], dtype) for c in self._chunks])
+
+        tids = sorted(self._tracks, key=lambda t: self._tracks[t][0])
+        tracks = [self._tracks[t] for t in tids]
+        meta = dict(self.meta, version=LOG_VERSION, last_frame=int(last_frame))
+        with open(self.path, "wb") as f:
+            np.savez_compressed(
+                f,
+                frames=np.asarray(self._frames, np.int64),
+                offsets=np.concatenate(([0], np.cumsum(self._counts, dtype=np.int64))),
+                boxes=column(0, np.float32, width=4),
+                ids=column(1, np.int64),
+                classes=column(2, np.int16),
+                confs=column(3, np.float32),
+                track_ids=np.asarray(tids, np.int64),
+                track_classes=np.asarray([t[1] for t in tracks], np.int16),
+                track_colors=np.asarray([t[2] for t in tracks], str),
+                track_plates=np.asarray([t[3] for t in tracks], str),
+                track_initial_plates=np.asarray([t[4] for t in tracks], str),
+                track_confs=np.asarray([t[5] for t in tracks], np.float32),
+                meta=np.asarray(json.dumps(meta)))
+        print(f"DEBUG: Detection log saved: {self.path} ({len(self._frames)} frames, {int(sum(self._counts))} boxes)")
+
+class DetectionLog:
+    """Read side of DetectionLogWriter. Loads everything eagerly; the arrays are small next to the video."""
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            self.meta = json.loads(str(data["meta"]))
+            if self.meta.get("version") != LOG_VERSION:
+                raise ValueError(f"Unsupported detection log version {self.meta.get('version')} in {path}")
+            for name in data.files:
+                if name != "meta": setattr(self, name, data[name])
+        self.last_frame = self.meta["last_frame"]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        """(frame_idx, detections) per analysis frame, detections in the tracker's (boxes, ids, clss, confs) form."""
+        for i, frame_idx in enumerate(self.frames):
+            a, b = self.offsets[i], self.offsets[i + 1]
+            if a == b:
+                yield int(frame_idx), None
+                continue
+            yield int(frame_idx), (self.boxes[a:b], self.ids[a:b], self.classes[a:b], self.confs[a:b])
+
+    def tracks(self):
+        """Counted tracks of the original run: {tid: (cls_id, color, best_plate, initial_plate, best_conf)}."""
+        return {int(t): (int(c), str(col), str(p), str(ip), float(conf)) for t, c, col, p, ip, conf in
+                zip(self.track_ids, self.track_classes, self.track_colors, self.track_plates,
+                    self.track_initial_plates, self.track_confs)}
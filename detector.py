@@ -0,0 +1,168 @@
+import os
+import glob
+import shutil
+import logging
+import tempfile
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+# Detector runtimes: name -> (ultralytics export format, suffix of the exported artifact)
+BACKENDS = {
+    "torch": (None, None),
+    "onnx": ("onnx", ".onnx"),              # ONNX Runtime (CPUExecutionProvider on CPU nodes)
+    "openvino": ("openvino", "_openvino_model"),
+}
+
+def export_path(weights, backend, cache_dir, imgsz=640):
+    """Where the exported model for (weights, backend, imgsz) is cached."""
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    return os.path.join(cache_dir, f"{stem}_{imgsz}{BACKENDS[backend][1]}")
+
+def export_model(weights, backend, cache_dir, imgsz=640):
+    """
+    Exports the PyTorch weights once and caches the artifact in cache_dir.
+    A cached export is reused as long as it is newer than the weights file.
+    Dynamic batch axis, so micro-batched analysis frames (infer_batch) work unchanged.
+    """
+    fmt, _ = BACKENDS[backend]
+    target = export_path(weights, backend, cache_dir, imgsz)
+    if os.path.exists(target) and (not os.path.exists(weights) or os.path.getmtime(target) >= os.path.getmtime(weights)):
+        return target
+
+    print(f"DEBUG: Exporting {weights} to {backend} (one-time, cached in {cache_dir})...")
+    os.makedirs(cache_dir, exist_ok=True)
+    # Worker and segment processes may export at the same time: each exports from a private copy of the
+    # weights in its own temp dir (ultralytics writes next to the weights) and renames the result into place
+    work = tempfile.mkdtemp(prefix=f".export-{os.getpid()}-", dir=cache_dir)
+    try:
+        source = weights if os.path.exists(weights) else YOLO(weights).ckpt_path  # Downloads missing weights
+        local = os.path.join(work, os.path.basename(source))
+        shutil.copy2(source, local)
+        exported = YOLO(local).export(format=fmt, imgsz=imgsz, dynamic=True, half=False, verbose=False)
+        if os.path.isdir(exported):
+            # A directory can't replace another one: drop a stale export first, and keep a fresh one
+            # that another process finished meanwhile
+            if os.path.exists(target) and os.path.getmtime(target) < os.path.getmtime(source):
+                shutil.rmtree(target, ignore_errors=True)
+            try:
+                os.replace(exported, target)
+            except OSError:
+                if not os.path.isdir(target): raise
+        else:
+            os.replace(exported, target)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return target
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+def calibration_frames(source, n_frames=64, imgsz=640):
+    """
+    Letterboxed, normalized NCHW frames sampled evenly from the videos in `source`
+    (a directory, e.g. the uploads folder, a video path, or a list of those), as the detector sees them.
+    """
+    from ultralytics.data.augment import LetterBox
+    paths = []
+    for entry in (source if isinstance(source, (list, tuple)) else [source]):
+        if os.path.isdir(entry):
+            paths += sorted(p for p in glob.glob(os.path.join(entry, "*")) if p.lower().endswith(VIDEO_EXTENSIONS))
+        elif os.path.isfile(entry) and os.path.abspath(entry) not in map(os.path.abspath, paths):
+            paths.append(entry)
+    if not paths:
+        raise RuntimeError(f"No calibration videos found in {source}")
+    letterbox = LetterBox((imgsz, imgsz), auto=False)
+    per_video = max(1, -(-n_frames // len(paths)))
+    frames = []
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for idx in np.linspace(0, max(total - 1, 0), per_video).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+            ret, frame = cap.read()
+            if not ret: continue
+            img = letterbox(image=frame)[..., ::-1].transpose(2, 0, 1)  # BGR HWC -> RGB CHW
+            frames.append(np.ascontiguousarray(img, dtype=np.float32)[None] / 255.0)
+        cap.release()
+        if len(frames) >= n_frames: break
+    if not frames:
+        raise RuntimeError(f"No readable calibration frames in {source}")
+    return frames[:n_frames]
+
+def quantize_int8(weights, cache_dir="model_cache", calibration_source="uploads", n_frames=64, imgsz=640, rebuild=False):
+    """
+    Post-training static INT8 quantization (ONNX Runtime, QDQ) of the ONNX export, calibrated on
+    frames from our own footage. Only convolutions are quantized: the head's concatenated box/score
+    output spans 0..imgsz and would lose the class scores at 8 bits. Cached like the FP32 export.
+    """
+    from onnxruntime.quantization import (quantize_static, CalibrationDataReader, QuantFormat,
+                                          QuantType, CalibrationMethod)
+    fp32 = export_model(weights, "onnx", cache_dir, imgsz)
+    target = fp32[:-len(".onnx")] + "_int8.onnx"
+    if not rebuild and os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(fp32):
+        return target
+
+    frames = calibration_frames(calibration_source, n_frames, imgsz)
+    print(f"DEBUG: Quantizing {fp32} to INT8 with {len(frames)} calibration frames...")
+
+    import onnx
+    model = onnx.load(fp32)
+
+    class Frames(CalibrationDataReader):
+        def __init__(self):
+            self.name = model.graph.input[0].name
+            self.it = iter(frames)
+        def get_next(self):
+            frame = next(self.it, None)
+            return None if frame is None else {self.name: frame}
+
+    # Written under a per-process name and renamed, like the exports. Given the loaded model (not its path),
+    # ONNX Runtime does its shape inference in a private temp dir instead of next to the shared FP32 export.
+    tmp = f"{target[:-len('.onnx')]}.{os.getpid()}.tmp.onnx"
+    try:
+        quantize_static(model, tmp, Frames(), quant_format=QuantFormat.QDQ, op_types_to_quantize=["Conv"],
+                        per_channel=True, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                        calibrate_method=CalibrationMethod.MinMax)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+    return target
+
+def expected_backend(precision, backend):
+    """Backend name load_detector reports when (precision, backend) loads without falling back."""
+    return "onnx-int8" if precision == "int8" else backend
+
+def backend_precision(backend):
+    """Precision of a backend name reported by load_detector."""
+    return "int8" if backend.endswith("-int8") else "fp32"
+
+def load_detector(weights, backend="torch", cache_dir="model_cache", imgsz=640, precision="fp32",
+                  calibration_source="uploads", calibration_frames_n=64, fallback=True):
+    """
+    YOLO model for `weights` on the requested runtime. Exported models go through the same
+    ultralytics predictor, so model.track() and its ByteTrack state work as with PyTorch.
+    precision="int8" loads the statically quantized ONNX model (ONNX Runtime, whatever the backend).
+    Falls back to the FP32 PyTorch model if the export, quantization or runtime is unavailable;
+    with fallback=False an unavailable INT8 model raises RuntimeError instead.
+    Returns (model, backend actually used), the backend being e.g. "onnx-int8" for the quantized model.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown detector backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    if precision not in ("fp32", "int8"):
+        raise ValueError(f"Unknown detector precision '{precision}' (expected fp32 or int8)")
+    if precision == "int8":
+        try:
+            path = quantize_int8(weights, cache_dir, calibration_source, calibration_frames_n, imgsz)
+            return YOLO(path, task="detect"), "onnx-int8"
+        except Exception as e:
+            if not fallback: raise RuntimeError(f"INT8 detector unavailable: {e}")
+            logger.error(f"INT8 detector unavailable, using FP32 PyTorch: {e}")
+            return YOLO(weights), "torch"
+    if backend != "torch":
+        try:
+            return YOLO(export_model(weights, backend, cache_dir, imgsz), task="detect"), backend
+        except Exception as e:
+            logger.error(f"Detector backend '{backend}' unavailable, using PyTorch: {e}")
+    return YOLO(weights), "torch"
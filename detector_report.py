@@ -0,0 +1,75 @@
+import os
+import time
+import tempfile
+import argparse
+
+CLASS_COUNTERS = ("cars", "bikes", "trucks", "total")
+# Forced for the comparison runs, whatever the processor was configured with
+REPORT_SETTINGS = {"video_output": "none", "detection_log": False, "checkpoint_seconds": 0}
+
+def compare_precisions(processor, video_path, precisions=("fp32", "int8")):
+    """
+    Runs the same video through each detector precision (no annotated video, no detection log,
+    no checkpoints: REPORT_SETTINGS override the processor's settings for the run) and returns {precision: stats}: per-class vehicle counts, the backend actually used, frames
+    analyzed, time spent in the detector and wall time. The first precision is the baseline.
+    """
+    report = {}
+    saved = processor.settings
+    processor.settings = {**saved, **REPORT_SETTINGS}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for precision in precisions:
+                t = time.perf_counter()
+                counters = processor.process_video(video_path, os.path.join(tmp, f"{precision}.csv"), None, precision=precision)
+                wall = time.perf_counter() - t
+                infer = counters["inference_seconds"]
+                report[precision] = {
+                    **{k: counters[k] for k in CLASS_COUNTERS},
+                    "detector": counters["detector"],
+                    "analyzed_frames": counters["analyzed_frames"],
+                    "inference_seconds": infer,
+                    "inference_fps": round(counters["analyzed_frames"] / infer, 2) if infer else 0.0,
+                    "wall_seconds": round(wall, 2),
+                }
+    finally:
+        processor.settings = saved
+    return report
+
+def format_report(report):
+    """Plain-text table of compare_precisions() output, with deltas against the first (baseline) column."""
+    names = list(report)
+    base = report[names[0]]
+    rows = [("", *names)]
+    rows.append(("detector", *(report[n]["detector"] for n in names)))
+    for key in CLASS_COUNTERS + ("analyzed_frames", "inference_seconds", "inference_fps", "wall_seconds"):
+        cells = []
+        for n in names:
+            value = report[n][key]
+            if n == names[0]:
+                cells.append(f"{value}")
+            elif key in CLASS_COUNTERS:
+                cells.append(f"{value} ({value - base[key]:+d})")
+            elif key in ("inference_fps", "wall_seconds", "inference_seconds") and base[key]:
+                cells.append(f"{value} (x{value / base[key]:.2f})")
+            else:
+                cells.append(f"{value}")
+        rows.append((key, *cells))
+    widths = [max(len(str(r[i])) for r in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(str(c).ljust(w) for c, w in zip(r, widths)) for r in rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare INT8 and FP32 detectors (vehicle counts, throughput) on one video.")
+    parser.add_argument("video", help="Video to process with each precision")
+    parser.add_argument("--calibration", help="Calibration videos for INT8 (default: SITA_INT8_CALIBRATION)")
+    parser.add_argument("--frames", type=int, help="Calibration frames (default: SITA_INT8_CALIBRATION_FRAMES)")
+    args = parser.parse_args()
+
+    from processor import SITAProcessor
+    settings = {}
+    if args.calibration: settings["int8_calibration_dir"] = args.calibration
+    if args.frames: settings["int8_calibration_frames"] = args.frames
+    processor = SITAProcessor(**settings)
+    try:
+        print(format_report(compare_precisions(processor, args.video)))
+    finally:
+        processor.close()
@@ -0,0 +1,129 @@
+import os
+import time
+import logging
+
+import database
+from model_loader import os_threading
+
+logger = logging.getLogger(__name__)
+
+def remove_job_input(params):
+    """Deletes a job's uploaded video once the job is final (queued and resumable jobs keep theirs)."""
+    path = (params or {}).get("filepath")
+    if not path or not os.path.exists(path): return
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.error(f"Failed to delete upload {path}: {e}")
+
+def execute_job(job, processor, on_progress=None):
+    """
+    Runs one claimed job (a jobs row with its decoded params) on `processor` and records the outcome
+    in the jobs table and the result cache. Counters are saved every few seconds while it runs and
+    passed to on_progress(job_id, counters). Returns the job's final public state.
+    """
+    from segmented import segment_count, process_video_segmented  # Imports processor (torch): workers only
+    job_id, params = job["id"], job["params"]
+    csv_path, video_path = params["csv_path"], params["video_path"]
+    last_save = 0
+
+    def progress(counters):
+        nonlocal last_save
+        if on_progress: on_progress(job_id, counters)
+        # Auto-Save Throttling (Save every 2 seconds max)
+        now = time.time()
+        if now - last_save > 2:
+            try:
+                database.update_job(job_id, counters=counters)
+                last_save = now
+            except Exception as e:
+                print(f"Auto-save failed: {e}")
+
+    state = {"id": job_id, "status": "processing", "counters": {"total": 0, "cars": 0, "bikes": 0, "trucks": 0},
+             "video_link": None, "csv_link": None, "error": None}
+    try:
+        print(f"DEBUG: Starting Job {job_id} for {params['filepath']}")
+        # PERFORMANCE: Long recordings are split into segments processed in parallel (SITA_SEGMENTS)
+        if segment_count(params["filepath"], processor.settings) > 1:
+            final_counters = process_video_segmented(params["filepath"], csv_path, video_path, update_callback=progress, precision=params.get("precision"),
+                                                     roi=params.get("roi"), **processor.settings)
+        else:
+            final_counters = processor.process_video(params["filepath"], csv_path, video_path, update_callback=progress,
+                                                     precision=params.get("precision"), roi=params.get("roi"),
+                                                     resume=params.get("resume", False))
+        # No annotated video in analysis-only mode (SITA_VIDEO_OUTPUT=none)
+        video_link = os.path.basename(video_path) if os.path.exists(video_path) else None
+        state.update(status="complete", counters=final_counters, video_link=video_link, csv_link=os.path.basename(csv_path))
+
+        # Final DB Update
+        database.update_job(job_id, status="complete", counters=final_counters, video_link=video_link,
+                            csv_link=state["csv_link"])
+        # Cached only if the detector that ran is the one the cache key was made for
+        if params.get("cache_key") and final_counters.get("detector") == params.get("detector", final_counters.get("detector")):
+            database.put_cached_result(params["cache_key"], params["content_hash"], final_counters, video_link, state["csv_link"])
+    except Exception as e:
+        logger.error(f"Processing failed ({job_id}): {e}")
+        state.update(status="error", error=str(e))
+        # Error DB Update
+        database.update_job(job_id, status="error", error=str(e))
+    remove_job_input(params)
+    return state
+
+class JobScheduler:
+    """
+    Runs the jobs queued in the `jobs` table on `workers` OS threads of the web process
+    (SITA_WORKER_MODE=thread). Each worker owns one SITAProcessor from the loader, so concurrent
+    jobs never share tracks or tracker state.
+    Queued jobs survive a restart: workers pick up whatever is still 'queued' in the table.
+    on_event(kind, job_id, data) receives "started", "progress" (counters) and "finished" (final state).
+    """
+    def __init__(self, loader, on_event, workers=1):
+        self.loader = loader
+        self.on_event = on_event
+        self.workers = max(1, int(workers))
+        self._wake = os_threading.Condition()
+        self._started = False
+
+    @property
+    def ready(self):
+        return self.loader.ready
+
+    def status(self):
+        return self.loader.status()
+
+    def signature(self, precision=None):
+        """Result signature of the loaded processors (see SITAProcessor.result_signature)."""
+        return self.loader.processor.result_signature(precision)
+
+    def start(self):
+        if self._started: return
+        self._started = True
+        self.loader.start()
+        for slot in range(self.workers):
+            os_threading.Thread(target=self._work, args=(slot,), name=f"sita-job-worker-{slot}", daemon=True).start()
+
+    def notify(self):
+        """Wakes an idle worker after a job was queued."""
+        with self._wake:
+            self._wake.notify()
+
+    def _work(self, slot):
+        processor = self.loader.get(slot=slot)
+        if processor is None:
+            logger.error(f"Job worker {slot}: no processor ({self.loader.error}), not taking jobs")
+            return
+        while True:
+            try:
+                job = database.claim_next_job()
+            except Exception as e:
+                logger.error(f"Job worker {slot}: failed to claim a job: {e}")
+                job = None
+            if job is None:
+                with self._wake:
+                    # Timeout as a fallback for jobs queued by another server process
+                    self._wake.wait(timeout=5)
+                continue
+            logger.info(f"Job worker {slot}: running {job['id']}")
+            self.on_event("started", job["id"], None)
+            state = execute_job(job, processor, lambda job_id, counters: self.on_event("progress", job_id, counters))
+            self.on_event("finished", job["id"], state)
@@ -0,0 +1,164 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import multiprocessing
+
+import database
+from job_queue import execute_job, remove_job_input
+from model_loader import os_threading
+
+logger = logging.getLogger(__name__)
+
+def worker_main(slot, settings, tasks, events):
+    """
+    Worker process: loads and warms up its own SITAProcessor, then runs queued jobs from the jobs
+    table. `tasks` carries wake-up tokens from the web tier (None = stop); `events` carries
+    (kind, slot, job_id, data) back to it.
+    """
+    logging.basicConfig(level=logging.INFO, format=f'%(asctime)s [%(levelname)s] [worker {slot}] %(message)s')
+    parent = os.getppid()
+    try:
+        t = time.perf_counter()
+        from processor import SITAProcessor
+        imports = round(time.perf_counter() - t, 2)
+        processor = SITAProcessor(**settings)
+        processor.warmup()
+        startup = {"imports": imports, **processor.startup_times, "total": round(time.perf_counter() - t, 2)}
+        signatures = {None: processor.result_signature(), **{p: processor.result_signature(p) for p in ("fp32", "int8")}}
+        events.put(("ready", slot, None, {"startup": startup, "signatures": signatures}))
+    except Exception as e:
+        events.put(("error", slot, None, str(e)))
+        return
+
+    while True:
+        try:
+            if tasks.get(timeout=5) is None: break
+        except queue.Empty:
+            # Timeout as a fallback for missed wake-ups; exit with the web tier
+            if os.getppid() != parent: break
+        while True:
+            try:
+                job = database.claim_next_job()
+            except Exception as e:
+                # e.g. 'database is locked': keep the worker (and its warm models), retry on the next wake-up
+                logger.error(f"Job worker {slot}: failed to claim a job: {e}")
+                job = None
+            if job is None: break
+            events.put(("started", slot, job["id"], None))
+            state = execute_job(job, processor, lambda job_id, counters: events.put(("progress", slot, job_id, counters)))
+            events.put(("finished", slot, job["id"], state))
+    processor.close()
+
+class WorkerPool:
+    """
+    Processing in `workers` separate processes (SITA_WORKER_MODE=process), so CPU-bound inference
+    and OCR never run inside the eventlet web process. The web tier only queues jobs in the jobs
+    table and reads their state; workers claim jobs from the table themselves.
+    A listener thread turns worker events into on_event(kind, job_id, data) calls, like JobScheduler,
+    and restarts a worker that dies (its job is marked as failed).
+    """
+    def __init__(self, on_event, workers=1, **settings):
+        self.on_event = on_event
+        self.workers = max(1, int(workers))
+        self.settings = settings
+        self.state = "idle"      # idle -> loading -> ready | error
+        self.error = None
+        self.startup = {}
+        self._signatures = None
+        self._ctx = multiprocessing.get_context("spawn")
+        self._tasks = self._ctx.Queue()
+        self._events = self._ctx.Queue()
+        self._procs = {}
+        self._running = {}       # slot -> job_id
+        self._loaded = set()     # slots that loaded their models (only those are restarted)
+        self._stopping = False
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def status(self):
+        return {"ready": self.state == "ready", "state": self.state, "error": self.error, "workers": self.workers,
+                "workers_alive": sum(p.is_alive() for p in self._procs.values()), "startup": dict(self.startup)}
+
+    def signature(self, precision=None):
+        """Result signature reported by the workers for a precision (see SITAProcessor.result_signature)."""
+        return dict(self._signatures[precision])
+
+    def start(self):
+        if self.state != "idle": return
+        self.state = "loading"
+        for slot in range(self.workers):
+            self._spawn(slot)
+        os_threading.Thread(target=self._listen, name="sita-worker-events", daemon=True).start()
+        atexit.register(self.stop)
+
+    def notify(self):
+        """Wakes an idle worker after a job was queued."""
+        self._tasks.put(True)
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        for _ in self._procs: self._tasks.put(None)
+        for proc in self._procs.values():
+            proc.join(timeout)
+            if proc.is_alive(): proc.terminate()
+
+    def _spawn(self, slot):
+        # Not a daemon: the worker's processor starts its own OCR pool processes
+        proc = self._ctx.Process(target=worker_main, args=(slot, self.settings, self._tasks, self._events),
+                                 name=f"sita-worker-{slot}", daemon=False)
+        proc.start()
+        self._procs[slot] = proc
+
+    def _listen(self):
+        checked = time.monotonic()
+        while not self._stopping:
+            if time.monotonic() - checked > 1:
+                self._check_workers()
+                checked = time.monotonic()
+            try:
+                kind, slot, job_id, data = self._events.get(timeout=1)
+            except queue.Empty:
+                continue
+            if kind == "ready":
+                self._loaded.add(slot)
+                if self.state != "ready":
+                    self.startup, self._signatures = data["startup"], data["signatures"]
+                    self.state = "ready"
+                    logger.info(f"SITA worker {slot} ready: {self.startup}")
+                continue
+            if kind == "error":
+                logger.error(f"SITA worker {slot} failed to load: {data}")
+                self._loaded.discard(slot)
+                self.error = data
+                if self.state != "ready": self.state = "error"
+                continue
+            if kind == "started": self._running[slot] = job_id
+            elif kind == "finished": self._running.pop(slot, None)
+            try:
+                self.on_event(kind, job_id, data)
+            except Exception as e:
+                logger.error(f"Worker event {kind} for {job_id} failed: {e}")
+
+    def _check_workers(self):
+        for slot, proc in list(self._procs.items()):
+            if proc.is_alive() or self._stopping: continue
+            if slot not in self._loaded:
+                # Died while loading, possibly without an "error" event: a load error, not restarted
+                del self._procs[slot]
+                logger.error(f"SITA worker {slot} exited ({proc.exitcode}) before loading its models")
+                self.error = self.error or f"Processing worker exited ({proc.exitcode}) before loading its models"
+                if self.state != "ready": self.state = "error"
+                continue
+            job_id = self._running.pop(slot, None)
+            logger.error(f"SITA worker {slot} exited ({proc.exitcode}), restarting")
+            if job_id:
+                error = f"Processing worker crashed (exit code {proc.exitcode})"
+                database.update_job(job_id, status="error", error=error)
+                remove_job_input((database.get_job(job_id) or {}).get("params"))
+                self.on_event("finished", job_id, {"id": job_id, "status": "error", "error": error})
+            self._loaded.discard(slot)   # Until the new process reports ready
+            self._spawn(slot)
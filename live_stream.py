@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import logging
+import signal
+import argparse
+import threading
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+class LiveSource:
+    """
+    Newest-frame reader for a live source: an RTSP/HTTP URL, a device index ("0") or a video file
+    (played at its own fps, optionally looped, as a stand-in for a camera).
+    A reader thread grabs continuously and keeps only the latest frame, so the consumer never works
+    through a backlog. Frames that are already more than `max_lag` seconds behind the source when
+    grabbed (the reader fell behind, or the stream delivered a burst) are skipped without decoding.
+    A broken stream is reopened every `reconnect_seconds` until stop().
+    Frames are numbered 1, 2, ... across reconnects and loops, skipped ones included.
+    """
+    def __init__(self, source, loop=False, max_lag=0.5, reconnect_seconds=2.0):
+        self.source = int(source) if str(source).isdigit() else source
+        self.is_file = isinstance(self.source, str) and os.path.isfile(self.source)
+        self.loop = loop
+        self.max_lag = max_lag
+        self.reconnect_seconds = reconnect_seconds
+        self.fps = 30.0
+        self.size = None
+        self.captured = 0     # Frames decoded and offered to the consumer
+        self.stale = 0        # Frames skipped by the reader because they were already too old
+        self.reconnects = 0
+        self.ended = False
+        self._cap = None
+        self._seq = 0
+        self._latest = None   # (seq, frame, born): born = monotonic time the frame was current at the source
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            cap.release()
+            return False
+        if not self.is_file:
+            # Keep the backend's own buffer small; the newest frame is what we want
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if fps and 1 <= fps <= 240: self.fps = fps
+        self.size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self._cap = cap
+        return True
+
+    def start(self):
+        """Opens the source (ValueError if it cannot be opened) and starts the reader thread."""
+        if not self._open(): raise ValueError(f"Cannot open stream source {self.source}")
+        print(f"DEBUG: Stream {self.source} opened: {self.size} @ {self.fps:.1f} fps")
+        self._thread = threading.Thread(target=self._run, name="sita-stream-reader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None: self._thread.join(timeout=5)
+        if self._cap is not None: self._cap.release()
+
+    def read(self, min_seq=0, timeout=1.0):
+        """
+        Takes the newest frame numbered min_seq or later, waiting up to `timeout` seconds for one.
+        Returns (seq, frame, born), or None on timeout or once the source has ended.
+        """
+        with self._cond:
+            ready = self._cond.wait_for(lambda: self.ended or (self._latest is not None and self._latest[0] >= min_seq),
+                                        timeout)
+            if not ready or self._latest is None or self._latest[0] < min_seq: return None
+            item, self._latest = self._latest, None
+            return item
+
+    def stats(self):
+        return {"captured": self.captured, "stale": self.stale, "reconnects": self.reconnects, "source_fps": round(self.fps, 2)}
+
+    def _end(self):
+        with self._cond:
+            self.ended = True
+            self._cond.notify_all()
+
+    def _reconnect(self):
+        """Reopens a broken stream. False once stopped (or for a file, which does not come back)."""
+        if self._cap is not None: self._cap.release()
+        self._cap = None
+        if self.is_file: return False
+        while not self._stop.wait(self.reconnect_seconds):
+            self.reconnects += 1
+            logger.error(f"Stream {self.source} lost, reconnecting (attempt {self.reconnects})")
+            if self._open(): return True
+        return False
+
+    def _run(self):
+        interval = 1.0 / self.fps
+        start, played = time.monotonic(), 0   # File pacing: frame n is due at start + n * interval
+        ref = None                            # Stream clock: (wall time, stream position) at the live edge
+        while not self._stop.is_set():
+            if self.is_file:
+                due = start + played * interval
+                wait = due - time.monotonic()
+                if wait > 0: time.sleep(wait)
+            t = time.monotonic()
+            if not self._cap.grab():
+                if self.is_file and self.loop:
+                    self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    start, played = time.monotonic(), 0
+                    continue
+                if not self._reconnect(): break
+                ref = None
+                continue
+            now = time.monotonic()
+            self._seq += 1
+            if self.is_file:
+                played += 1
+                lag = max(0.0, now - due)
+            else:
+                # A grab that blocked means we are at the live edge; a fast one means buffered (older) data
+                pos = self._cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if ref is None or now - t >= interval / 2 or now - ref[0] < pos - ref[1]: ref = (now, pos)
+                lag = (now - ref[0]) - (pos - ref[1])
+            if lag > self.max_lag:
+                self.stale += 1
+                continue
+            ret, frame = self._cap.retrieve()
+            if not ret: continue
+            self.captured += 1
+            with self._cond:
+                self._latest = (self._seq, frame, now - lag)
+                self._cond.notify_all()
+        self._end()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count vehicles on a live stream (RTSP URL, device index or looped file) until stopped.")
+    parser.add_argument("source", help="RTSP/HTTP URL, camera index (0) or video file")
+    parser.add_argument("--out", help="Per-vehicle rows (CSV, or NDJSON/SQLite by extension)")
+    parser.add_argument("--loop", action="store_true", help="Loop a video file source")
+    parser.add_argument("--latency-ms", type=int, help="End-to-end latency target (default: SITA_STREAM_LATENCY_MS)")
+    parser.add_argument("--seconds", type=float, help="Stop after this many seconds (default: until Ctrl+C)")
+    parser.add_argument("--roi", help='Region of interest as JSON, e.g. "[[0.1, 0.4], [0.9, 0.4], [0.9, 1], [0.1, 1]]"')
+    parser.add_argument("--show", action="store_true", help="Show the annotated frames (q to quit)")
+    args = parser.parse_args()
+
+    from processor import SITAProcessor
+    settings = {"detection_log": False}
+    if args.latency_ms: settings["stream_latency_ms"] = args.latency_ms
+    processor = SITAProcessor(**settings)
+    stop = threading.Event()
+    # Ctrl+C ends the stream cleanly: pending plates are merged and the last rows written
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    def show(frame):
+        cv2.imshow("SITA - Live", frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'): stop.set()
+
+    try:
+        counters = processor.process_stream(
+            args.source, args.out, stop_event=stop, loop=args.loop, max_seconds=args.seconds,
+            roi=json.loads(args.roi) if args.roi else None, frame_callback=show if args.show else None,
+            update_callback=lambda c: print(json.dumps({k: v for k, v in c.items() if k != "queues"})),
+            row_callback=lambda row: print("ROW", ",".join(map(str, row))))
+        print(json.dumps(counters))
+    finally:
+        processor.close()
+        if args.show: cv2.destroyAllWindows()
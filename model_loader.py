@@ -0,0 +1,75 @@
+import time
+import logging
+
+try:
+    # Under gunicorn's eventlet worker `threading` is monkey-patched into green threads, and a
+    # CPU-bound model load there would starve the hub. The loader needs a real OS thread.
+    from eventlet.patcher import original as _original
+    os_threading = _original("threading")
+except ImportError:
+    import threading as os_threading
+
+logger = logging.getLogger(__name__)
+
+class ProcessorLoader:
+    """
+    Builds the SITAProcessors in the background so the server answers requests while the heavy
+    imports (torch, ultralytics, easyocr), weight loading and warmup inference happen.
+    One processor per job worker (`workers`): a processor holds one job's tracks and tracker state.
+    `startup` holds the time spent in each phase (of the first processor), in seconds.
+    """
+    def __init__(self, workers=1, **settings):
+        self.settings = settings
+        self.workers = max(1, int(workers))
+        self.state = "idle"      # idle -> loading -> ready | error
+        self.error = None
+        self.startup = {}
+        self.processors = []
+        self._ready = os_threading.Event()
+        self._lock = os_threading.Lock()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    @property
+    def processor(self):
+        """The first processor (shared, read-only uses such as the result signature)."""
+        return self.processors[0] if self.state == "ready" else None
+
+    def start(self):
+        with self._lock:
+            if self.state != "idle": return
+            self.state = "loading"
+        os_threading.Thread(target=self._load, name="sita-model-loader", daemon=True).start()
+
+    def _load(self):
+        t = time.perf_counter()
+        try:
+            from processor import SITAProcessor
+            self.startup["imports"] = round(time.perf_counter() - t, 2)
+            processors = []
+            for _ in range(self.workers):
+                processor = SITAProcessor(**self.settings)
+                processor.warmup()
+                processors.append(processor)
+            self.startup.update(processors[0].startup_times)
+            self.startup["total"] = round(time.perf_counter() - t, 2)
+            self.processors = processors
+            self.state = "ready"
+            logger.info(f"SITA Processor ready: {self.startup}")
+        except Exception as e:
+            self.state = "error"
+            self.error = str(e)
+            logger.error(f"SITA Processor failed to load: {e}")
+        finally:
+            self._ready.set()
+
+    def get(self, timeout=None, slot=0):
+        """Processor `slot` once loaded (waits up to `timeout` seconds), else None."""
+        self._ready.wait(timeout)
+        return self.processors[slot] if self.state == "ready" else None
+
+    def status(self):
+        return {"ready": self.state == "ready", "state": self.state, "error": self.error, "workers": self.workers,
+                "startup": dict(self.startup)}
@@ -0,0 +1,75 @@
+import cv2
+
+class MotionSampler:
+    """
+    Decides which decoded frames go to detection.
+    Every frame is shrunk to a small grayscale thumbnail and compared with a reference thumbnail
+    taken up to `active_skip` frames earlier (so slow vehicles have moved far enough to show);
+    the share of pixels that changed is the motion signal. While the scene moves (and for
+    `hold` frames after), every `active_skip`-th frame is analyzed; on a static scene the
+    rate drops to every `idle_skip`-th frame. Counting still needs the same number of
+    sightings per track, it just waits for them on quiet footage.
+    With idle_skip == active_skip this is the plain fixed frame_skip sampler.
+    """
+    def __init__(self, active_skip=5, idle_skip=30, threshold=0.002, hold=45, size=(160, 90), pixel_delta=15):
+        self.active_skip = max(1, int(active_skip))
+        self.idle_skip = max(self.active_skip, int(idle_skip))
+        self.threshold = threshold      # Share of thumbnail pixels that must change to count as motion
+        self.hold = hold                # Frames to stay at the active rate after the last motion
+        self.size = size
+        self.pixel_delta = pixel_delta  # Gray level change that marks a pixel as changed
+        self.adaptive = self.idle_skip > self.active_skip
+        self._ref = None
+        self._ref_age = 0
+        self._since_motion = 0          # Start at the active rate; the first probes have no reference yet
+        self._since_analysis = 0
+        self.analyzed = 0
+        self.active_frames = 0
+
+    @property
+    def skip(self):
+        return self.active_skip if self._since_motion <= self.hold else self.idle_skip
+
+    def motion(self, frame):
+        """Share of changed pixels between this frame and the reference (0.0 on the first frame)."""
+        # PERFORMANCE: Nearest-neighbour decimation to twice the thumbnail size, then INTER_AREA.
+        # ~0.1 ms on 1080p versus ~3 ms for INTER_AREA on the full frame. The blur suppresses sensor noise.
+        w, h = self.size
+        thumb = cv2.resize(frame, (w * 2, h * 2), interpolation=cv2.INTER_NEAREST)
+        thumb = cv2.resize(thumb, self.size, interpolation=cv2.INTER_AREA)
+        thumb = cv2.GaussianBlur(cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY), (3, 3), 0)
+        ref = self._ref
+        self._ref_age += 1
+        if ref is None or self._ref_age >= self.active_skip:
+            self._ref, self._ref_age = thumb, 0
+        if ref is None: return 0.0
+        diff = cv2.absdiff(thumb, ref)
+        changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)[1])
+        return changed / diff.size
+
+    def probe_due(self, frame_idx):
+        """
+        For decoders that skip frames with grab(): only every active_skip-th frame has to be
+        decoded (motion probe and analysis candidate). Other frames are passed as None.
+        """
+        return frame_idx % self.active_skip == 0
+
+    def should_analyze(self, frame):
+        """
+        Feed every frame, in order (None for a frame that was grabbed but not decoded).
+        True if this one should be analyzed. A frame that is None is never picked; analysis
+        then waits for the next decoded frame.
+        """
+        if not self.adaptive:
+            self._since_motion = 0
+        elif frame is not None and self.motion(frame) >= self.threshold:
+            self._since_motion = 0
+        else:
+            self._since_motion += 1
+        if self._since_motion <= self.hold: self.active_frames += 1
+
+        self._since_analysis += 1
+        if frame is None or self._since_analysis < self.skip: return False
+        self._since_analysis = 0
+        self.analyzed += 1
+        return True
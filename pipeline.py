@@ -0,0 +1,70 @@
+import queue
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# End-of-stream marker passed between stages
+SENTINEL = object()
+
+class StagePipeline:
+    """
+    Runs processing stages on their own threads, connected by bounded FIFO queues.
+    One producer and one consumer per queue, so frame order is preserved end to end.
+    """
+    def __init__(self, depth=8):
+        self.depth = max(1, int(depth))
+        self.queues = {}
+        self.stop = threading.Event()
+        self.errors = []
+        self._threads = []
+
+    def queue(self, name):
+        """Creates the input queue of the stage called `name`."""
+        q = queue.Queue(maxsize=self.depth)
+        self.queues[name] = q
+        return q
+
+    def put(self, q, item):
+        """Blocking put that gives up once the pipeline is aborted. Returns False if aborted."""
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, q):
+        """Blocking get that returns SENTINEL once the pipeline is aborted."""
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return SENTINEL
+
+    def start(self, name, target, *args):
+        def run():
+            try:
+                target(*args)
+            except Exception as e:
+                logger.error(f"Pipeline stage '{name}' failed: {e}")
+                self.errors.append(e)
+                self.stop.set()
+        t = threading.Thread(target=run, name=f"sita-{name}", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def depths(self):
+        """Current fill level of every stage's input queue. A full queue marks the slow stage."""
+        return {name: q.qsize() for name, q in self.queues.items()}
+
+    def abort(self):
+        self.stop.set()
+
+    def join(self, raise_errors=True):
+        for t in self._threads:
+            t.join()
+        if raise_errors and self.errors:
+            raise self.errors[0]
@@ -0,0 +1,240 @@
+import os
+import re
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# OPTIMIZATION: Allowlist for AlphaNumeric only
+PLATE_ALLOWLIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Candidate variants produced by PlateReader.prepare_candidates (default cascade order)
+VARIANTS = ("otsu", "clahe", "raw")
+
+def clean_plate(text):
+    return text.upper().replace(" ", "").replace(".", "").replace("-", "")
+
+def plate_is_confident(text, score, min_conf, pattern=None):
+    """Cascade exit rule: confident AND (if a pattern is configured) well-formed."""
+    if text == "Not Detected" or score < min_conf: return False
+    return not pattern or re.fullmatch(pattern, text) is not None
+
+class PlatePreprocessor:
+    """
+    Plate-band crop -> grayscale OCR candidates without per-call allocations.
+    Owns the sharpening kernel and CLAHE instance, and writes every intermediate into
+    reusable buffers that only grow. Buffers are kept per slot, so the candidates of
+    several crops (one slot per crop of a frame's OCR batch) can be alive at once.
+    Returned candidates are views that the next call on the same slot overwrites.
+    """
+    def __init__(self):
+        # 1. Sharpening Kernel
+        self.kernel = np.array([[0, -1, 0], [-1, 5,-1], [0, -1, 0]], np.float32)
+        # 4. CLAHE
+        self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
+        self._buffers = {}
+
+    def buffer(self, slot, name, shape):
+        """uint8 view of `shape` backed by the (slot, name) buffer, grown only when too small."""
+        size = shape[0] * shape[1]
+        buf = self._buffers.get((slot, name))
+        if buf is None or buf.size < size:
+            buf = np.empty(size, np.uint8)
+            self._buffers[(slot, name)] = buf
+        return buf[:size].reshape(shape)
+
+    def prepare(self, crop, frame_width, slot=0):
+        if crop.size == 0: return None
+        h, w, _ = crop.shape
+        if w < (frame_width * 0.05): return None
+
+        # Expand Crop Rule: Start at 40% height, End at 85%
+        p_y1, p_y2 = int(h * 0.40), int(h * 0.85)
+        p_x1, p_x2 = int(w * 0.05), int(w * 0.95)
+        plate_crop = crop[p_y1:p_y2, p_x1:p_x2]
+        if plate_crop.size == 0: return None
+        ph, pw = plate_crop.shape[:2]
+
+        # Dynamic Padding + Grayscale: convert straight into the middle of a zeroed, padded buffer
+        pad = max(5, int(frame_width * 0.01))
+        gray = self.buffer(slot, "gray", (ph + 2*pad, pw + 2*pad))
+        gray.fill(0)
+        cv2.cvtColor(plate_crop, cv2.COLOR_BGR2GRAY, dst=gray[pad:pad+ph, pad:pad+pw])
+
+        # 2. Resize ONCE (2x cubic); every candidate derives from the same upscaled image.
+        # Include the raw resized image as a candidate, as sometimes filters destroy features.
+        up_shape = (gray.shape[0] * 2, gray.shape[1] * 2)
+        raw_resized = self.buffer(slot, "raw", up_shape)
+        cv2.resize(gray, (up_shape[1], up_shape[0]), dst=raw_resized, interpolation=cv2.INTER_CUBIC)
+
+        # 1. Sharpening (applied at the upscaled resolution)
+        sharpened = self.buffer(slot, "sharpened", up_shape)
+        cv2.filter2D(raw_resized, -1, self.kernel, dst=sharpened)
+
+        # 3. Thresholding Candidates
+        thresh_otsu = self.buffer(slot, "otsu", up_shape)
+        cv2.threshold(sharpened, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=thresh_otsu)
+
+        # 4. CLAHE
+        enhanced = self.buffer(slot, "clahe", up_shape)
+        self.clahe.apply(sharpened, dst=enhanced)
+
+        return {"otsu": thresh_otsu, "clahe": enhanced, "raw": raw_resized}
+
+class PlateReader:
+    """Plate-band cropping, enhancement and EasyOCR. Shared by SITAProcessor and the OCR pool workers."""
+    def __init__(self, reader):
+        self.reader = reader
+        # PERFORMANCE: One preprocessing engine (kernel, CLAHE, buffers) per reader
+        self.preprocessor = PlatePreprocessor()
+
+    def prepare_candidates(self, crop, frame_width, slot=0):
+        """Localizes the plate band and returns the grayscale OCR candidates by variant name, or None if unusable."""
+        return self.preprocessor.prepare(crop, frame_width, slot)
+
+    def detect_plate(self, crop, frame_width):
+        """Full readtext on every candidate (no cascade). Returns (text, score)."""
+        text, score, _ = self.read_plates([crop], frame_width, "detect", cascade=None)[0]
+        return text, score
+
+    def _readtext_images(self, images):
+        """Detector + recognizer per image. Returns the best (text, score) per image."""
+        best = []
+        for img in images:
+            best_text, best_score = "Not Detected", 0.0
+            try:
+                results = self.reader.readtext(img, allowlist=PLATE_ALLOWLIST)
+                for (_, text, score) in results:
+                    clean = clean_plate(text)
+                    # Penalize short strings
+                    if len(clean) < 4: continue
+                    
+                    if score > best_score:
+                        best_score = score
+                        best_text = clean
+            except: pass
+            best.append((best_text, best_score))
+        return best
+
+    def _recognize_images(self, images):
+        """
+        Recognition-only OCR: skips EasyOCR's CRAFT text detector (the crops are already
+        localized) and runs all images through ONE recognizer call.
+        Returns the best (text, score) per image.
+        """
+        best = [("Not Detected", 0.0)] * len(images)
+
+        # Stack candidates on one canvas; each gets its own box, which the recognizer crops out exactly.
+        canvas = self.preprocessor.buffer("ocr", "canvas", (sum(img.shape[0] for img in images), max(img.shape[1] for img in images)))
+        canvas.fill(0)
+        boxes, owner = [], {}
+        y = 0
+        for k, img in enumerate(images):
+            h, w = img.shape
+            canvas[y:y+h, :w] = img
+            boxes.append([0, w, y, y+h])
+            owner[y] = k
+            y += h
+
+        try:
+            recognized = self.reader.recognize(canvas, horizontal_list=boxes, free_list=[],
+                                               allowlist=PLATE_ALLOWLIST, batch_size=len(boxes), detail=1)
+        except Exception as e:
+            logger.error(f"Batched Plate Recognition Failed: {e}")
+            return best
+
+        for (points, text, score) in recognized:
+            k = owner.get(int(points[0][1]))
+            if k is None: continue
+            clean = clean_plate(text)
+            # Penalize short strings
+            if len(clean) < 4: continue
+            if score > best[k][1]:
+                best[k] = (clean, float(score))
+        return best
+
+    def read_plates(self, crops, frame_width, mode="detect", order=VARIANTS, cascade=None):
+        """
+        OCR for all due crops of one frame. mode: 'detect' (full readtext) or 'recognize'.
+        Candidate variants run in `order`, one round per variant across all crops. With a
+        cascade (conf, pattern), a crop leaves the rounds as soon as its plate clears both.
+        Returns one (text, score, winning_variant) per crop.
+        """
+        results = [("Not Detected", 0.0, None)] * len(crops)
+        candidates = [self.prepare_candidates(crop, frame_width, slot=i) for i, crop in enumerate(crops)]
+        open_idx = [i for i, c in enumerate(candidates) if c is not None]
+        ocr_images = self._recognize_images if mode == "recognize" else self._readtext_images
+
+        for variant in order:
+            if not open_idx: break
+            for i, (text, score) in zip(open_idx, ocr_images([candidates[i][variant] for i in open_idx])):
+                if score > results[i][1]:
+                    results[i] = (text, score, variant)
+            if cascade:
+                # PERFORMANCE: Early exit for confident, well-formed plates
+                open_idx = [i for i in open_idx if not plate_is_confident(results[i][0], results[i][1], *cascade)]
+        return results
+
+
+class VariantStats:
+    """
+    Per-deployment win counts of the OCR candidate variants, persisted as JSON.
+    The cascade tries the historically best variant first.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.wins = {v: 0 for v in VARIANTS}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    for v, n in json.load(f).items():
+                        if v in self.wins: self.wins[v] = int(n)
+            except Exception as e:
+                logger.error(f"OCR Stats Load Failed: {e}")
+
+    def order(self):
+        # Stable sort: ties keep the default variant order
+        return sorted(VARIANTS, key=lambda v: -self.wins[v])
+
+    def record(self, variant):
+        if variant in self.wins: self.wins[variant] += 1
+
+    def save(self):
+        if not self.path: return
+        try:
+            # Write-then-rename: several processes (OCR workers, segments) may save at once
+            if os.path.dirname(self.path): os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self.wins, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.error(f"OCR Stats Save Failed: {e}")
+
+
+# --- OCR Worker Pool ---
+# Each worker process loads its own EasyOCR Reader once (initializer) and reuses it for every task.
+_worker_reader = None
+
+def _init_worker(use_gpu, threads):
+    global _worker_reader
+    import torch
+    import easyocr
+    # Avoid oversubscribing the CPU: workers split the cores between them
+    torch.set_num_threads(threads)
+    _worker_reader = PlateReader(easyocr.Reader(['en'], gpu=use_gpu))
+
+def run_plate_ocr(crops, frame_width, mode="detect", order=VARIANTS, cascade=None):
+    """Pool task: returns one (text, score, winning_variant) per vehicle crop of a frame."""
+    return _worker_reader.read_plates(crops, frame_width, mode, order, cascade)
+
+def create_ocr_pool(workers, use_gpu=False):
+    # spawn: CUDA/torch state must not be inherited through fork
+    ctx = multiprocessing.get_context("spawn")
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                               initializer=_init_worker, initargs=(use_gpu, threads))
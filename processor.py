@@ -1,16 +1,39 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import easyocr
 import os
-import csv
+import copy
+import time
+import pickle
 import logging
+from collections import deque
+from pipeline import StagePipeline, SENTINEL
+from result_sinks import open_sink
+from track_store import TrackStore
+from motion_sampler import MotionSampler
+from video_writer import open_video_writer, PartedVideoWriter
+from checkpoint import checkpoint_path, save_checkpoint, load_checkpoint, remove_checkpoint, snapshot_trackers, restore_trackers
+from detection_log import DetectionLogWriter
+from detector import load_detector, expected_backend, backend_precision
+from roi import RegionOfInterest
+from vehicle_color import ColorClassifier
+from plate_ocr import PlateReader, VariantStats, VARIANTS, create_ocr_pool, run_plate_ocr
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class VehicleData:
-    def __init__(self, cls_id, bbox):
+    """
+    Per-track state. One is created for every ByteTrack ID, so it is a __slots__ record:
+    no per-instance __dict__, and the OCR queue is only allocated once OCR is dispatched.
+    """
+    __slots__ = ("cls_id", "frames_seen", "last_seen_frame", "locked", "plate_locked", "ocr_attempts",
+                 "csv_written", "pending_ocr", "color", "type_str", "initial_plate", "best_plate",
+                 "best_conf", "seq", "tid")
+
+    TYPE_NAMES = {2: "Car", 3: "Bike", 7: "Truck"}
+
+    def __init__(self, cls_id, bbox=None):
         self.cls_id = cls_id
         self.frames_seen = 0
         self.last_seen_frame = 0
@@ -18,120 +41,509 @@ class VehicleData:
         self.plate_locked = False # Initial OCR Success
         self.ocr_attempts = 0     # Increased cap
         self.csv_written = False  
+        self.pending_ocr = None   # In-flight pool OCR (future, index) pairs, submission order
+        self.seq = 0              # First-seen order, assigned by TrackStore
+        self.tid = None           # Tracker ID, assigned by TrackStore
         
         self.color = "Blue"  # Default
-        self.type_str = "Car"
+        self.type_str = self.TYPE_NAMES.get(cls_id, "Car")
         
         # OCR Data
         self.initial_plate = "Not Detected"
         self.best_plate = "Not Detected"
         self.best_conf = 0.0
+
+# Processing Settings (overridable per processor via SITAProcessor(**settings))
+DEFAULT_SETTINGS = {
+    # PERFORMANCE: Number of analysis frames per YOLO forward pass (1 = per-frame model.track)
+    "infer_batch": int(os.getenv("SITA_INFER_BATCH", "1")),
+    # PERFORMANCE: Max frames waiting in front of each pipeline stage
+    "pipeline_depth": int(os.getenv("SITA_PIPELINE_DEPTH", "16")),
+    # PERFORMANCE: Plate OCR worker processes (0 = run OCR inline in the tracking loop)
+    "ocr_workers": int(os.getenv("SITA_OCR_WORKERS", "2")),
+    # PERFORMANCE: 'detect' = full EasyOCR readtext, 'recognize' = recognizer only on our plate crops
+    "ocr_mode": os.getenv("SITA_OCR_MODE", "detect"),
+    # PERFORMANCE: Stop trying candidate variants once a plate reaches this confidence
+    # and matches plate_pattern (empty pattern = confidence only). 0 (default) disables the cascade:
+    # every variant is read and plates don't depend on past jobs.
+    "ocr_cascade_conf": float(os.getenv("SITA_OCR_CASCADE_CONF", "0")),
+    "plate_pattern": os.getenv("SITA_PLATE_PATTERN", r"[A-Z]{2}[0-9]{1,2}[A-Z]{0,3}[0-9]{4}"),
+    # Variant win statistics (cascade ordering adapts per deployment), kept with the model cache
+    "ocr_stats_path": os.getenv("SITA_OCR_STATS", os.path.join(os.getenv("SITA_MODEL_CACHE", "model_cache"), "ocr_variant_stats.json")),
+    # PERFORMANCE: Pixel budget for color classification of large crops (0 = every pixel, exact labels)
+    "color_max_pixels": int(os.getenv("SITA_COLOR_MAX_PIXELS", "0")),
+    # PERFORMANCE: Result rows are buffered and flushed every N rows or T seconds (and at job end)
+    "sink_flush_rows": int(os.getenv("SITA_SINK_FLUSH_ROWS", "200")),
+    "sink_flush_seconds": float(os.getenv("SITA_SINK_FLUSH_SECONDS", "2")),
+    # Retired tracks are kept this many frames in case the tracker revives their ID, then dropped
+    # (ByteTrack forgets lost tracks after 30 tracker updates = 150 frames at frame_skip 5)
+    "track_forget_frames": int(os.getenv("SITA_TRACK_FORGET_FRAMES", "600")),
+    # PERFORMANCE: Motion-adaptive sampling. Every frame_skip-th frame is analyzed while the scene moves,
+    # every idle_frame_skip-th frame on static footage (idle_frame_skip = frame_skip gives fixed sampling)
+    "frame_skip": int(os.getenv("SITA_FRAME_SKIP", "5")),
+    "idle_frame_skip": int(os.getenv("SITA_IDLE_FRAME_SKIP", "30")),
+    # Share of (thumbnail) pixels that must change between frames to count as motion
+    "motion_threshold": float(os.getenv("SITA_MOTION_THRESHOLD", "0.002")),
+    # Frames to keep the active rate after the last motion
+    "motion_hold_frames": int(os.getenv("SITA_MOTION_HOLD_FRAMES", "45")),
+    # Annotated video: "full" (every frame), "analysis" (analysis frames only, on a fps / frame_skip timeline:
+    # a frame is repeated until the next one is due, so idle stretches keep their real duration)
+    # or "none" (CSV/counters only). The last two skip non-analysis frames with cap.grab().
+    "video_output": os.getenv("SITA_VIDEO_OUTPUT", "full"),
+    # PERFORMANCE: Annotated video encoder. "ffmpeg" pipes raw frames into a local ffmpeg process
+    # (falls back to the OpenCV VP9/VP8/mp4v chain if ffmpeg or the codec is missing), "opencv" forces the chain.
+    "video_writer": os.getenv("SITA_VIDEO_WRITER", "ffmpeg"),
+    "ffmpeg_bin": os.getenv("SITA_FFMPEG_BIN", "ffmpeg"),
+    "ffmpeg_codec": os.getenv("SITA_FFMPEG_CODEC", "libvpx-vp9"),
+    "ffmpeg_crf": int(os.getenv("SITA_FFMPEG_CRF", "32")),
+    "ffmpeg_deadline": os.getenv("SITA_FFMPEG_DEADLINE", "realtime"),
+    "ffmpeg_cpu_used": int(os.getenv("SITA_FFMPEG_CPU_USED", "8")),
+    "ffmpeg_threads": int(os.getenv("SITA_FFMPEG_THREADS", "0")),
+    # Sightings (analysis frames) before a track is counted
+    "count_sightings": int(os.getenv("SITA_COUNT_SIGHTINGS", "5")),
+    # Per-frame boxes/IDs/classes/confidences saved to <csv name>_detections.npz, for reanalysis.py
+    "detection_log": os.getenv("SITA_DETECTION_LOG", "1") == "1",
+    # PERFORMANCE: Detector runtime: "torch" (eager PyTorch), "onnx" (ONNX Runtime) or "openvino".
+    # Exports are made once and cached in model_cache_dir.
+    "detector_backend": os.getenv("SITA_DETECTOR_BACKEND", "torch"),
+    "model_cache_dir": os.getenv("SITA_MODEL_CACHE", "model_cache"),
+    # Detector precision: "fp32", or "int8" (post-training static quantization, ONNX Runtime).
+    # Default for jobs; each job can override it (process_video(precision=...)).
+    "detector_precision": os.getenv("SITA_DETECTOR_PRECISION", "fp32"),
+    # INT8 calibration: frames sampled evenly from the videos in this folder (our own uploads)
+    "int8_calibration_dir": os.getenv("SITA_INT8_CALIBRATION", "uploads"),
+    "int8_calibration_frames": int(os.getenv("SITA_INT8_CALIBRATION_FRAMES", "64")),
+    # PERFORMANCE: Long recordings are split into this many time segments, processed in parallel
+    # processes and stitched (see segmented.py). 1 = off. Only videos of segment_min_seconds or more.
+    "segments": int(os.getenv("SITA_SEGMENTS", "1")),
+    "segment_min_seconds": int(os.getenv("SITA_SEGMENT_MIN_SECONDS", "300")),
+    # Frames each segment starts early to warm up its tracker; boundary tracks are matched on them
+    "segment_overlap_frames": int(os.getenv("SITA_SEGMENT_OVERLAP_FRAMES", "300")),
+    # Live streams (process_stream): end-to-end latency target, source frame to result. Frames already
+    # older than this are skipped by the reader; the share of analyzed frames over it is reported.
+    "stream_latency_ms": int(os.getenv("SITA_STREAM_LATENCY_MS", "500")),
+    "stream_reconnect_seconds": float(os.getenv("SITA_STREAM_RECONNECT_SECONDS", "2")),
+    # Jobs save a checkpoint (tracks, counters, tracker state, rows and video so far) this often, in seconds,
+    # and an interrupted job resumes from its last one (process_video(resume=True)). 0 disables checkpoints.
+    "checkpoint_seconds": float(os.getenv("SITA_CHECKPOINT_SECONDS", "60")),
+}
+
+# ByteTrack keeps a lost track for this many tracker updates (track_buffer in bytetrack.yaml)
+TRACKER_BUFFER = 30
+# A track unseen for this many analysis strides is retired and its row written
+EXPIRE_STRIDES = 3
+
+def detection_log_path(output_csv_path):
+    return os.path.splitext(output_csv_path)[0] + "_detections.npz"
+
+def count_vehicle(v, counters):
+    counters["total"] += 1
+    if v.type_str == "Car": counters["cars"] += 1
+    elif v.type_str == "Bike": counters["bikes"] += 1
+    elif v.type_str == "Truck": counters["trucks"] += 1
+
+def result_row(v, frame_idx):
+    # Write BEST and INITIAL
+    return (v.type_str, v.color, v.best_plate, v.initial_plate, v.best_conf, frame_idx)
+
+def draw_vehicle(frame, v, x1, y1, x2, y2):
+    color = (0, 255, 0)
+    # Show BEST plate on UI
+    lbl = v.type_str
+    if v.best_plate != "Not Detected": 
+        color, lbl = (0, 255, 255), v.best_plate
         
-        if cls_id == 2: self.type_str = "Car"
-        elif cls_id == 3: self.type_str = "Bike"
-        elif cls_id == 7: self.type_str = "Truck"
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+    (tw, th), _ = cv2.getTextSize(lbl, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+    cv2.rectangle(frame, (x1, y1-20), (x1+tw, y1), color, -1)
+    cv2.putText(frame, lbl, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,0), 2)
+
+TRACK_CLASSES = [2, 3, 7]
+YOLO_WEIGHTS = "yolov8s.pt"
+
+# Settings that only change speed or bookkeeping, never counts, rows or the video (left out of result_signature)
+RESULT_NEUTRAL_SETTINGS = {"infer_batch", "pipeline_depth", "ocr_workers", "ocr_stats_path", "sink_flush_rows",
+                           "sink_flush_seconds", "ffmpeg_bin", "ffmpeg_threads", "detection_log", "model_cache_dir",
+                           "stream_latency_ms", "stream_reconnect_seconds", "checkpoint_seconds"}
 
 class SITAProcessor:
-    def __init__(self):
+    def __init__(self, **settings):
+        self.settings = {**DEFAULT_SETTINGS, **settings}
         logger.info("Initializing SITA Processor (VIVA-SAFE)...")
         print("DEBUG: Loading YOLO Model...")
-        self.model = YOLO("yolov8s.pt") 
-        print("DEBUG: YOLO Loaded. Initializing OCR...")
+        self.startup_times = {}
+        t = time.perf_counter()
+        self._detectors = {}
+        self.model, self.detector_backend = self.detector()
+        self.startup_times["weights"] = round(time.perf_counter() - t, 2)
+        print(f"DEBUG: YOLO Loaded ({self.detector_backend}). Initializing OCR...")
+        t = time.perf_counter()
         # OPTIMIZATION: Enable GPU and allowlist
         import torch
         use_gpu = torch.cuda.is_available()
         print(f"DEBUG: OCR GPU Accelerated: {use_gpu}")
         self.reader = easyocr.Reader(['en'], gpu=use_gpu)
+        self.plate_reader = PlateReader(self.reader)
+        self.ocr_stats = VariantStats(self.settings["ocr_stats_path"])
+        self.startup_times["ocr"] = round(time.perf_counter() - t, 2)
         print("DEBUG: OCR Initialized.")
-        self.tracks = {}
+        self.tracks = TrackStore()
+        self.color_classifier = ColorClassifier(max_pixels=self.settings["color_max_pixels"])
 
-    def detect_color(self, crop):
-        if crop.size == 0: return "Blue"
-        h, w, _ = crop.shape
-        # Smart Center Crop
-        center = crop[int(h*0.2):int(h*0.75), int(w*0.25):int(w*0.75)]
-        if center.size == 0: return "Blue"
-        
-        hsv = cv2.cvtColor(center, cv2.COLOR_BGR2HSV)
-        ranges = {
-            "White": [((0, 0, 180), (180, 50, 255))],
-            "Black": [((0, 0, 0), (180, 255, 50))],
-            "Red":   [((0, 70, 50), (10, 255, 255)), ((170, 70, 50), (180, 255, 255))],
-            "Blue":  [((100, 150, 0), (140, 255, 255))],
-            "Gray":  [((0, 0, 50), (180, 50, 180))]
+        # OCR Pool (workers load their own Reader on first use)
+        self._ocr_pool = None
+        self._ocr_inflight = set()
+        self._detection_log = None
+        self._infer_seconds = 0.0
+        self._roi = None
+        self._tracker_snapshot = None
+        if self.settings["ocr_workers"] > 0:
+            self._ocr_pool = create_ocr_pool(self.settings["ocr_workers"], use_gpu)
+            print(f"DEBUG: OCR Pool Ready ({self.settings['ocr_workers']} workers)")
+
+    def detector(self, precision=None, calibration_video=None):
+        """
+        (model, backend) for a detector precision, loaded on first use and kept for later jobs.
+        An INT8 model is calibrated on the videos in int8_calibration_dir plus `calibration_video` (the job's
+        own video), so it can be built even when no other uploads are around.
+        Only the default precision falls back to FP32 (reported in the backend name); an explicitly requested
+        INT8 detector that is unavailable raises RuntimeError, so the job fails instead of running FP32.
+        """
+        explicit = precision is not None
+        precision = precision or self.settings["detector_precision"]
+        if precision not in self._detectors:
+            calibration = [self.settings["int8_calibration_dir"]] + ([calibration_video] if calibration_video else [])
+            self._detectors[precision] = load_detector(
+                YOLO_WEIGHTS, self.settings["detector_backend"], self.settings["model_cache_dir"], precision=precision,
+                calibration_source=calibration,
+                calibration_frames_n=self.settings["int8_calibration_frames"], fallback=not explicit)
+            # Ahead of the tracker's own postprocess callback, so out-of-ROI detections never reach ByteTrack
+            self._detectors[precision][0].callbacks["on_predict_postprocess_end"].insert(0, self._drop_outside_roi)
+            self._detectors[precision][0].callbacks["on_predict_postprocess_end"].insert(0, self._restore_tracker_state)
+        if explicit and backend_precision(self._detectors[precision][1]) != precision:
+            raise RuntimeError(f"{precision.upper()} detector unavailable (fell back to {self._detectors[precision][1]} at startup)")
+        return self._detectors[precision]
+
+    def _restore_tracker_state(self, predictor):
+        # Resumed job: the checkpoint's ByteTrack state goes in before the tracker sees the first frame
+        snapshot, self._tracker_snapshot = self._tracker_snapshot, None
+        if snapshot is not None: restore_trackers(predictor, snapshot)
+
+    def _drop_outside_roi(self, predictor):
+        roi = self._roi
+        if roi is None: return
+        for i, r in enumerate(predictor.results):
+            if len(r.boxes): predictor.results[i] = r[roi.inside(r.boxes.xyxy.cpu().numpy())]
+
+    def warmup(self):
+        """One throwaway detection and recognition pass, so the first job doesn't pay for lazy initialization."""
+        t = time.perf_counter()
+        self.model.predict(np.zeros((640, 640, 3), np.uint8), classes=TRACK_CLASSES, imgsz=640, verbose=False)
+        self.reader.recognize(np.zeros((32, 100), np.uint8), horizontal_list=[[0, 100, 0, 32]], free_list=[], detail=1)
+        self.startup_times["warmup"] = round(time.perf_counter() - t, 2)
+
+    def result_signature(self, precision=None):
+        """
+        Everything besides the video itself that determines a job's output (result cache key input).
+        Backend and precision are those of the detector actually loaded for `precision` (a default INT8
+        detector that fell back says torch / fp32). One not loaded yet is assumed to load as requested;
+        explicitly requested INT8 never falls back (see detector()).
+        """
+        import ultralytics
+        weights = YOLO_WEIGHTS if os.path.exists(YOLO_WEIGHTS) else None
+        precision = precision or self.settings["detector_precision"]
+        loaded = self._detectors.get(precision)
+        backend = loaded[1] if loaded else expected_backend(precision, self.settings["detector_backend"])
+        return {
+            "settings": {k: v for k, v in self.settings.items() if k not in RESULT_NEUTRAL_SETTINGS},
+            "model": YOLO_WEIGHTS,
+            "backend": backend,
+            "precision": backend_precision(backend),
+            "model_bytes": os.path.getsize(weights) if weights else None,
+            "ultralytics": ultralytics.__version__,
+            "easyocr": getattr(easyocr, "__version__", None),
         }
-        
-        best_color = "Blue"
-        max_pixels = 0
-        total = center.shape[0] * center.shape[1]
-        
-        for name, r_list in ranges.items():
-            count = 0
-            for (low, high) in r_list:
-                mask = cv2.inRange(hsv, np.array(low), np.array(high))
-                count += cv2.countNonZero(mask)
-            if count > max_pixels and (count/total) > 0.3:
-                max_pixels = count
-                best_color = name
-        return best_color
+
+    def close(self):
+        """Shuts down the OCR worker processes."""
+        if self._ocr_pool is not None:
+            self._ocr_pool.shutdown(wait=False, cancel_futures=True)
+            self._ocr_pool = None
+
+    def detect_color(self, crop):
+        # PERFORMANCE: Precomputed HSV lookup tables (see vehicle_color.py)
+        return self.color_classifier.classify(crop)
 
     def detect_plate(self, crop, frame_width):
-        if crop.size == 0: return "Not Detected", 0.0
-        h, w, _ = crop.shape
-        if w < (frame_width * 0.05): return "Not Detected", 0.0
-
-        # Expand Crop Rule: Start at 40% height, End at 85%
-        p_y1, p_y2 = int(h * 0.40), int(h * 0.85)
-        p_x1, p_x2 = int(w * 0.05), int(w * 0.95)
-        plate_crop = crop[p_y1:p_y2, p_x1:p_x2]
-        if plate_crop.size == 0: return "Not Detected", 0.0
-
-        # Dynamic Padding
-        pad = max(5, int(frame_width * 0.01))
-        plate_crop = cv2.copyMakeBorder(plate_crop, pad, pad, pad, pad, cv2.BORDER_CONSTANT, value=(0,0,0))
-
-        # Preprocessing: Grayscale
-        gray = cv2.cvtColor(plate_crop, cv2.COLOR_BGR2GRAY)
-        
-        # 1. Sharpening Kernel (New)
-        kernel = np.array([[0, -1, 0], [-1, 5,-1], [0, -1, 0]])
-        sharpened = cv2.filter2D(gray, -1, kernel)
-        
-        # 2. Resize
-        resized = cv2.resize(sharpened, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
-        
-        # 3. Thresholding Candidates
-        _, thresh_otsu = cv2.threshold(resized, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # 4. CLAHE
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(resized)
-        
-        # Candidates for OCR
-        # Include 'gray' (raw resized) as sometimes filters destroy features
-        raw_resized = cv2.resize(gray, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
-        candidates = [thresh_otsu, enhanced, raw_resized]
-
-        best_text = "Not Detected"
-        best_score = 0.0
-
-        for img in candidates:
-            try:
-                # OPTIMIZATION: Allowlist for AlphaNumeric only
-                results = self.reader.readtext(img, allowlist='0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-                for (_, text, score) in results:
-                    clean = text.upper().replace(" ", "").replace(".", "").replace("-", "")
-                    # Penalize short strings
-                    if len(clean) < 4: continue
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_text = clean
-            except: pass
-        
-        return best_text, best_score
+        return self.plate_reader.detect_plate(crop, frame_width)
+
+    def _merge_plate(self, v, text, score):
+        """Folds one OCR attempt into the track's Dual-Plate state."""
+        if text != "Not Detected" and score > 0.3: # Threshold
+            # Update Best Plate
+            if score > v.best_conf:
+                v.best_conf = score
+                v.best_plate = text
+            
+            # Set Initial Plate if empty
+            if v.initial_plate == "Not Detected":
+                v.initial_plate = text
+                v.plate_locked = True # We have at least one lock
+
+    def _variant_order(self):
+        """OCR variant order for a job: past wins with the cascade, the fixed default order without it."""
+        return self.ocr_stats.order() if self.settings["ocr_cascade_conf"] > 0 else list(VARIANTS)
+
+    def _collect_ocr(self, wait=False):
+        """
+        Merges finished pool OCR results into their tracks. Results are applied strictly in
+        submission order per track, so best/initial plates match the synchronous path.
+        """
+        for tid in list(self._ocr_inflight):
+            v = self.tracks.find(tid)
+            if v is None:
+                self._ocr_inflight.discard(tid)
+                continue
+            while v.pending_ocr and (wait or v.pending_ocr[0][0].done()):
+                future, i = v.pending_ocr.pop(0)
+                try:
+                    text, score, variant = future.result()[i]
+                except Exception as e:
+                    logger.error(f"OCR Worker Failed (track {tid}): {e}")
+                    continue
+                self.ocr_stats.record(variant)
+                self._merge_plate(v, text, score)
+            if not v.pending_ocr:
+                self._ocr_inflight.discard(tid)
+
+    def _dispatch_ocr(self, ocr_due, frame_width):
+        """Runs (or submits) OCR for every track due this frame as one batch. ocr_due: [(tid, crop)]"""
+        crops = [crop for _, crop in ocr_due]
+        mode = self.settings["ocr_mode"]
+        cascade = None
+        if self.settings["ocr_cascade_conf"] > 0:
+            cascade = (self.settings["ocr_cascade_conf"], self.settings["plate_pattern"])
+        if self._ocr_pool is not None:
+            # PERFORMANCE: OCR off the tracking loop. Copy, since the frame gets drawn on next.
+            future = self._ocr_pool.submit(run_plate_ocr, [crop.copy() for crop in crops], frame_width,
+                                           mode, self._ocr_order, cascade)
+            for i, (tid, _) in enumerate(ocr_due):
+                v = self.tracks.live[tid]
+                if v.pending_ocr is None: v.pending_ocr = []
+                v.pending_ocr.append((future, i))
+                self._ocr_inflight.add(tid)
+        else:
+            results = self.plate_reader.read_plates(crops, frame_width, mode, self._ocr_order, cascade)
+            for (tid, _), (text, score, variant) in zip(ocr_due, results):
+                self.ocr_stats.record(variant)
+                self._merge_plate(self.tracks.live[tid], text, score)
+
+    def _track_frames(self, frames, model):
+        """
+        Runs detection + tracking for consecutive analysis frames.
+        Returns one (boxes, ids, clss, confs) tuple per frame, or None when nothing is tracked.
+        """
+        # PERFORMANCE: A list source is letterboxed and inferred as ONE batch, while non-stream sources
+        # share a single persistent tracker that is updated frame by frame in list order.
+        # Counts therefore match the one-frame-per-call path exactly.
+        # OPTIMIZATION: With an ROI only its bounding crop is letterboxed to 640 (higher effective resolution)
+        roi = self._roi
+        if roi is not None: frames = [roi.crop(frame) for frame in frames]
+        results = model.track(frames, persist=True, tracker="bytetrack.yaml", 
+                                   classes=TRACK_CLASSES, imgsz=640, verbose=False) # Increased imgsz for better detection
+        tracked = []
+        for r in results:
+            if r.boxes.id is None:
+                tracked.append(None)
+                continue
+            boxes = r.boxes.xyxy.cpu().numpy()
+            if roi is not None: boxes = roi.to_frame(boxes)
+            tracked.append((boxes, r.boxes.id.cpu().numpy(), r.boxes.cls.cpu().numpy(), r.boxes.conf.cpu().numpy()))
+        return tracked
+
+    def _analyze_frame(self, frame, frame_idx, detections, frame_width, counters, update_callback=None, draw=True):
+        """Applies counting, color, OCR and drawing for one analysis frame."""
+        if detections is None: return
+
+        ocr_due = []
+        drawn = []
+        boxes, ids, clss, confs = detections
+        for box, tid, cid in zip(boxes, ids, clss):
+            tid = int(tid)
+            v = self.tracks.get(tid)
+            if v is None: 
+                v = VehicleData(int(cid), box)
+                self.tracks.add(tid, v)
+            v.frames_seen += 1
+            self.tracks.touch(tid, frame_idx)
+            
+            x1, y1, x2, y2 = map(int, box)
+            crop = frame[y1:y2, x1:x2]
+
+            # LOGIC: Count & Color
+            if not v.locked and v.frames_seen == self.settings["count_sightings"]:
+                v.locked = True
+                v.color = self.detect_color(crop)
+                count_vehicle(v, counters)
+                if update_callback: update_callback(counters)
+
+            # LOGIC: OCR (Enhanced)
+            # Try OCR more times (up to 10) to find best plate
+            if v.ocr_attempts < 10: 
+                if v.frames_seen >= 5 and v.frames_seen % 5 == 0: # Check frequency increased
+                    v.ocr_attempts += 1
+                    ocr_due.append((tid, crop))
+            drawn.append((v, x1, y1, x2, y2))
+
+        # PERFORMANCE: All due plates of this frame go out as one OCR batch (before any drawing)
+        if ocr_due: self._dispatch_ocr(ocr_due, frame_width)
+        if not draw: return
+
+        for v, x1, y1, x2, y2 in drawn:
+            # DRAWING
+            draw_vehicle(frame, v, x1, y1, x2, y2)
+
+    def _write_result(self, v, frame_idx, sink):
+        sink.write(result_row(v, frame_idx))
+        v.csv_written = True
+        if self._detection_log is not None: self._detection_log.add_track(v.tid, v)
+
+    def _retire_tracks(self, frame_idx, sink):
+        # Cleanup Old Tracks & Write Best Result
+        # PERFORMANCE: Only tracks whose expiry came due are visited (see TrackStore)
+        for v in self.tracks.expire(frame_idx):
+            self._write_result(v, frame_idx, sink)
+
+    def _decode_stage(self, pipe, cap, out_q, sampler, scale, size, skip_frames=False, first_idx=0, last_idx=None,
+                      checkpoints=None, checkpoint_every=0):
+        """
+        Decoder thread: reads and resizes frames, tags the ones the sampler picks for analysis.
+        With skip_frames only analysis frames are emitted; frames that are not even a motion
+        probe are skipped with cap.grab() (no BGR conversion, copy or resize).
+        The capture is positioned after frame `first_idx`; decoding stops after frame `last_idx`.
+        Every `checkpoint_every` seconds the next analysis frame becomes a checkpoint frame: it is
+        entered in `checkpoints` with the sampler state as of that frame.
+        """
+        frame_idx = first_idx
+        next_checkpoint = time.monotonic() + checkpoint_every
+        while last_idx is None or frame_idx < last_idx:
+            if skip_frames and not sampler.probe_due(frame_idx + 1):
+                if not cap.grab(): break
+                frame_idx += 1
+                sampler.should_analyze(None)
+                continue
+            ret, frame = cap.read()
+            if not ret: break
+            frame_idx += 1
+            is_analysis = sampler.should_analyze(frame)
+            if is_analysis and checkpoints is not None and time.monotonic() >= next_checkpoint:
+                checkpoints[frame_idx] = {"sampler": copy.copy(sampler)}
+                next_checkpoint = time.monotonic() + checkpoint_every
+            if skip_frames and not is_analysis: continue
+            if scale != 1.0: frame = cv2.resize(frame, size)
+            if not pipe.put(out_q, (frame_idx, frame, is_analysis)): return
+        if skip_frames:
+            # Frame-less marker so end-of-video rows carry the same frame number as in full mode
+            if not pipe.put(out_q, (frame_idx, None, False)): return
+        pipe.put(out_q, SENTINEL)
+
+    def _infer_stage(self, pipe, in_q, out_q, infer_batch, model, checkpoints=None):
+        """
+        Inference thread: buffers analysis frames (and the skipped frames between them, to keep
+        output order) until `infer_batch` of them can share one forward pass.
+        Emits (frame_idx, frame, is_analysis, detections) in input order.
+        A checkpoint frame ends its batch, and the tracker state after it is added to `checkpoints`.
+        """
+        pending = []
+        pending_analysis = 0
+        while True:
+            item = pipe.get(in_q)
+            done = item is SENTINEL
+            if not done:
+                if not pending and not item[2]:
+                    # Nothing waiting on inference, pass straight through
+                    if not pipe.put(out_q, (*item, None)): return
+                    continue
+                pending.append(item)
+                if item[2]: pending_analysis += 1
+                if pending_analysis < infer_batch and not (checkpoints and item[0] in checkpoints): continue
 
-    def process_video(self, video_path, output_csv_path, output_video_path, update_callback=None):
+            if pending:
+                analysis = [(idx, frame) for idx, frame, is_analysis in pending if is_analysis]
+                try:
+                    t = time.perf_counter()
+                    tracked = self._track_frames([frame for _, frame in analysis], model)
+                    self._infer_seconds += time.perf_counter() - t
+                except Exception as e:
+                    logger.error(f"Frames {analysis[0][0]}-{analysis[-1][0]} Inference Failed: {e}")
+                    tracked = [None] * len(analysis)
+                if checkpoints and analysis and analysis[-1][0] in checkpoints:
+                    checkpoints[analysis[-1][0]]["tracker"] = snapshot_trackers(model)
+                detections = {idx: dets for (idx, _), dets in zip(analysis, tracked)}
+                for frame_idx, frame, is_analysis in pending:
+                    if not pipe.put(out_q, (frame_idx, frame, is_analysis, detections.get(frame_idx))): return
+                pending, pending_analysis = [], 0
+
+            if done:
+                pipe.put(out_q, SENTINEL)
+                return
+
+    def _write_stage(self, pipe, in_q, out):
+        """VideoWriter thread: encodes frames in arrival order. Callables in the queue (checkpoints) run in order."""
+        while True:
+            frame = pipe.get(in_q)
+            if frame is SENTINEL: return
+            if callable(frame): frame()
+            else: out.write(frame)
+
+    def _put_timed(self, pipe, encode_q, frame, position, timeline):
+        """
+        Analysis-only video: repeats the last written frame up to `position` on the output timeline, then
+        adds `frame` (None = pad only, at the end of the video). timeline: {"written": n, "last": frame}
+        """
+        while timeline["last"] is not None and timeline["written"] < position:
+            if not pipe.put(encode_q, timeline["last"]): return False
+            timeline["written"] += 1
+        if frame is None: return True
+        timeline["last"] = frame
+        timeline["written"] += 1
+        return pipe.put(encode_q, frame)
+
+    def _checkpoint(self, pipe, encode_q, out, path, job_key, frame_idx, counters, sink, stages):
+        """
+        Saves the job's state as of analysis frame `frame_idx` (`stages`: what the decoder and inference
+        threads recorded for it). With a video, the encoder thread cuts the current part once every
+        frame up to here is written, then saves the checkpoint, so it never points at an unfinished part.
+        """
+        self._collect_ocr(wait=True)   # In-flight OCR futures cannot be saved
+        state = pickle.dumps({"job": job_key, "frame_idx": frame_idx, "counters": counters, "tracks": self.tracks,
+                              "ocr_order": self._ocr_order, "infer_seconds": self._infer_seconds,
+                              "detection_log": self._detection_log, "sink_position": sink.position(), **stages},
+                             protocol=pickle.HIGHEST_PROTOCOL)
+        if out is None:
+            save_checkpoint(path, state)
+            return True
+        return pipe.put(encode_q, lambda: save_checkpoint(path, state, out.rotate()))
+
+    def process_video(self, video_path, output_csv_path, output_video_path, update_callback=None, result_sink=None,
+                      precision=None, roi=None, start_frame=0, end_frame=None, warmup_frames=0, resume=False):
+        """
+        Analyzes one video. Vehicle rows go to `result_sink` if given (caller owns it), otherwise to a
+        sink opened on output_csv_path (CSV, or NDJSON/SQLite by extension) that lives for this job.
+        `precision` ("fp32" / "int8") overrides the detector precision for this job.
+        `roi` is the camera's region of interest, [[x, y], ...] as fractions of the frame size (see roi.py).
+        start_frame / end_frame restrict the job to frames start_frame+1 .. end_frame (frame numbers stay
+        those of the whole video). The `warmup_frames` before start_frame are tracked (and logged) but
+        not written to the video, so tracks are established at the start (see segmented.py).
+        Every checkpoint_seconds the job's state is saved next to the CSV (job-owned sinks only, see
+        checkpoint.py). With `resume` the job continues from that checkpoint, if it was made for the
+        same inputs and settings: the capture is seeked to the checkpoint frame, and tracks, tracker,
+        sampler, counters, rows and video parts are restored, so results match an uninterrupted run.
+        """
+        model, backend = self.detector(precision, calibration_video=video_path)
+        # Fresh ByteTrack state per job: lost tracks of the previous video must not match this one's vehicles
+        for tracker in getattr(getattr(model, "predictor", None), "trackers", ()): tracker.reset()
+        self._infer_seconds = 0.0
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened(): raise ValueError("Video Error")
 
@@ -139,6 +551,19 @@ class SITAProcessor:
         h_orig = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        first_idx = progress_from = max(0, start_frame - warmup_frames)
+
+        checkpoint_every = self.settings["checkpoint_seconds"] if result_sink is None and output_csv_path else 0
+        ckpt_path = checkpoint_path(output_csv_path) if checkpoint_every > 0 else None
+        job_key = {"source": os.path.abspath(video_path), "signature": self.result_signature(precision), "roi": roi,
+                   "start_frame": start_frame, "end_frame": end_frame, "warmup_frames": warmup_frames}
+        restored = load_checkpoint(ckpt_path) if resume and ckpt_path else None
+        if restored is not None and restored["job"] != job_key:
+            print("DEBUG: Checkpoint was made with other inputs or settings, starting over")
+            restored = None
+        if restored is not None: first_idx = restored["frame_idx"]
+        if first_idx: cap.set(cv2.CAP_PROP_POS_FRAMES, first_idx)
+        if end_frame is not None: total_frames = min(total_frames, end_frame) if total_frames > 0 else end_frame
         
         # PERFORMANCE: Relaxed limit to 1920px for better OCR
         scale = 1.0
@@ -147,45 +572,87 @@ class SITAProcessor:
             w_out, h_out = 1920, int(h_orig * scale)
         else:
             w_out, h_out = w_orig, h_orig
+        self._roi = RegionOfInterest(roi, (w_out, h_out)) if roi else None
+        if self._roi is not None:
+            print(f"DEBUG: ROI crop {self._roi.crop_size} of {(w_out, h_out)}")
 
-        # CODEC FIX: Use VP9 (WebM) for browser compatibility.
-        try:
-            fourcc = cv2.VideoWriter_fourcc(*'vp09') # VP9
-            out = cv2.VideoWriter(output_video_path, fourcc, fps, (w_out, h_out))
-            if not out.isOpened():
-                print("DEBUG: VP9 Failed, trying VP8...")
-                fourcc = cv2.VideoWriter_fourcc(*'vp80') # VP8
-                out = cv2.VideoWriter(output_video_path, fourcc, fps, (w_out, h_out))
-            
-            if not out.isOpened():
-                # Last resort fallback
-                print("DEBUG: VP8 Failed, trying mp4v fallback...")
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                out = cv2.VideoWriter(output_video_path, fourcc, fps, (w_out, h_out))
-        except Exception as e:
-            logger.error(f"VideoWriter Init Failed: {e}")
-            raise e
-
-        self.tracks = {}
-        with open(output_csv_path, 'w', newline='') as f:
-            # Updated Header for Dual Plate Tracking
-            csv.writer(f).writerow(["vehicle_type", "color", "number_plate", "initial_plate", "confidence", "frame"])
-
-        frame_idx = 0
+        video_output = self.settings["video_output"]
+        if video_output not in ("full", "analysis", "none"):
+            raise ValueError(f"Unknown video_output '{video_output}'")
+        # PERFORMANCE: Without a full-rate video, non-analysis frames are never decoded to BGR nor encoded
+        skip_frames = video_output != "full"
+        out = None
+        timeline = None
+        if video_output != "none":
+            out_fps = fps if video_output == "full" else max(1, round(fps / self.settings["frame_skip"]))
+            # Analysis frames are placed at their source time (the sampler's stride varies with motion)
+            if video_output == "analysis": timeline = {"written": 0, "last": None}
+            if ckpt_path:
+                # Checkpointed job: the video is written in parts that end at checkpoints
+                out = PartedVideoWriter(output_video_path, out_fps, (w_out, h_out), self.settings,
+                                        parts=restored["video_parts"] if restored else ())
+            else:
+                out = open_video_writer(output_video_path, out_fps, (w_out, h_out), self.settings)
+
+        sampler = MotionSampler(self.settings["frame_skip"], self.settings["idle_frame_skip"],
+                                self.settings["motion_threshold"], self.settings["motion_hold_frames"])
+        # At the idle rate the tracker's lost-track buffer spans more frames; retired tracks must outlive it
+        # or a revived ID would be counted twice
+        forget = max(self.settings["track_forget_frames"], (TRACKER_BUFFER + 1) * sampler.idle_skip)
+        # Likewise a track is only retired (row written) once it was missed on a few analysis frames at the
+        # idle rate; a fixed 15 frames is less than one idle stride, so rows came out before the best plate
+        self.tracks = TrackStore(expire_after=max(15, EXPIRE_STRIDES * sampler.idle_skip), forget_after=forget)
+        self._ocr_inflight = set()
+        # Cascade order is frozen per job (from past jobs' wins) so results stay deterministic
+        self._ocr_order = self._variant_order()
+        # PERFORMANCE: One buffered writer for the whole job instead of an open() per row
+        sink = result_sink or open_sink(output_csv_path, flush_rows=self.settings["sink_flush_rows"],
+                                        flush_seconds=self.settings["sink_flush_seconds"],
+                                        resume_at=restored["sink_position"] if restored else None)
+        self._detection_log = None
+        if self.settings["detection_log"]:
+            self._detection_log = DetectionLogWriter(
+                detection_log_path(output_csv_path), source=os.path.abspath(video_path), fps=fps,
+                width=w_out, height=h_out, count_sightings=self.settings["count_sightings"],
+                expire_after=self.tracks.expire_after, forget_after=self.tracks.forget_after, roi=roi)
+
+        frame_idx = first_idx
         counters = {"total": 0, "cars": 0, "bikes": 0, "trucks": 0, "progress": 0}
-        frame_skip = 5
+        self._tracker_snapshot = None
+        if restored is not None:
+            # Everything as it was right after the checkpoint frame
+            sampler, self.tracks, self._ocr_order = restored["sampler"], restored["tracks"], restored["ocr_order"]
+            counters, self._infer_seconds = restored["counters"], restored["infer_seconds"]
+            if self._detection_log is not None: self._detection_log = restored["detection_log"] or self._detection_log
+            self._tracker_snapshot = restored.get("tracker")
+            if timeline is not None: timeline = restored["video_timeline"]
+            print(f"DEBUG: Resuming from the checkpoint at frame {first_idx}: {counters}")
+        checkpoints = {} if ckpt_path else None
+
+        # PERFORMANCE: Micro-batching of analysis frames (see _infer_stage)
+        infer_batch = max(1, int(self.settings["infer_batch"]))
+
+        # PERFORMANCE: Staged pipeline. decode -> inference -> annotation (this thread) -> encode.
+        # Each queue is named after the stage that consumes it, so the fullest queue is the bottleneck.
+        pipe = StagePipeline(depth=self.settings["pipeline_depth"])
+        infer_q, annotate_q, encode_q = pipe.queue("inference"), pipe.queue("annotation"), pipe.queue("encode")
+        pipe.start("decoder", self._decode_stage, pipe, cap, infer_q, sampler, scale, (w_out, h_out), skip_frames,
+                   first_idx, end_frame, checkpoints, checkpoint_every)
+        pipe.start("inference", self._infer_stage, pipe, infer_q, annotate_q, infer_batch, model, checkpoints)
+        if out is not None: pipe.start("encoder", self._write_stage, pipe, encode_q, out)
         
         try:
             while True:
-                ret, frame = cap.read()
-                if not ret: break
-                frame_idx += 1
+                item = pipe.get(annotate_q)
+                if item is SENTINEL: break
+                frame_idx, frame, is_analysis, detections = item
                 
                 # PROGRESS LOGIC
                 if frame_idx % 10 == 0:
-                    logger.info(f"DEBUG: Processing Frame {frame_idx}")
-                    if total_frames > 0:
-                        progress = int((frame_idx / total_frames) * 100)
+                    counters["queues"] = pipe.depths()
+                    logger.info(f"DEBUG: Processing Frame {frame_idx} | Queues {counters['queues']}")
+                    if total_frames > progress_from:
+                        progress = int(((frame_idx - progress_from) / (total_frames - progress_from)) * 100)
                         if progress > 99: progress = 99 
                     else:
                         progress = 50 
@@ -194,101 +661,185 @@ class SITAProcessor:
                     if update_callback: update_callback(counters)
                 
                 # Optimized Output
-                if frame_idx % frame_skip != 0:
-                    out.write(cv2.resize(frame, (w_out, h_out)))
+                write = out is not None and frame_idx > start_frame
+                position = (frame_idx - start_frame - 1) * out_fps // fps if timeline is not None else None
+                if not is_analysis:
+                    if write and frame is not None:
+                        if not pipe.put(encode_q, frame): break
+                    elif write and timeline is not None:
+                        # End of video: the last analysis frame is held until the source ends
+                        if not self._put_timed(pipe, encode_q, None, position + 1, timeline): break
                     continue
 
-                if scale != 1.0: frame = cv2.resize(frame, (w_out, h_out))
-                
+                if self._detection_log is not None: self._detection_log.add_frame(frame_idx, detections)
+                self._collect_ocr()
                 try:
-                    results = self.model.track(frame, persist=True, tracker="bytetrack.yaml", 
-                                             classes=[2, 3, 7], imgsz=640, verbose=False) # Increased imgsz for better detection
-                    
-                    frame_ids = []
-                    for r in results:
-                        if r.boxes.id is not None:
-                            boxes, ids, clss, confs = r.boxes.xyxy.cpu().numpy(), r.boxes.id.cpu().numpy(), r.boxes.cls.cpu().numpy(), r.boxes.conf.cpu().numpy()
-                            for box, tid, cid, conf in zip(boxes, ids, clss, confs):
-                                tid = int(tid)
-                                frame_ids.append(tid)
-                                if tid not in self.tracks: 
-                                    v_obj = VehicleData(int(cid), box)
-                                    v_obj.confidence = float(conf)
-                                    self.tracks[tid] = v_obj
-                                v = self.tracks[tid]
-                                v.frames_seen += 1
-                                v.last_seen_frame = frame_idx
-                                
-                                x1, y1, x2, y2 = map(int, box)
-                                crop = frame[y1:y2, x1:x2]
-
-                                # LOGIC: Count & Color
-                                if not v.locked and v.frames_seen == 5:
-                                    v.locked = True
-                                    v.color = self.detect_color(crop)
-                                    counters["total"] += 1
-                                    if v.type_str == "Car": counters["cars"] += 1
-                                    elif v.type_str == "Bike": counters["bikes"] += 1
-                                    elif v.type_str == "Truck": counters["trucks"] += 1
-                                    if update_callback: update_callback(counters)
-
-                                # LOGIC: OCR (Enhanced)
-                                # Try OCR more times (up to 10) to find best plate
-                                if v.ocr_attempts < 10: 
-                                    if v.frames_seen >= 5 and v.frames_seen % 5 == 0: # Check frequency increased
-                                        v.ocr_attempts += 1
-                                        text, score = self.detect_plate(crop, w_out)
-                                        
-                                        if text != "Not Detected" and score > 0.3: # Threshold
-                                            # Update Best Plate
-                                            if score > v.best_conf:
-                                                v.best_conf = score
-                                                v.best_plate = text
-                                            
-                                            # Set Initial Plate if empty
-                                            if v.initial_plate == "Not Detected":
-                                                v.initial_plate = text
-                                                v.plate_locked = True # We have at least one lock
-
-                                # DRAWING
-                                color = (0, 255, 0)
-                                # Show BEST plate on UI
-                                lbl = v.type_str
-                                if v.best_plate != "Not Detected": 
-                                    color, lbl = (0, 255, 255), v.best_plate
-                                    
-                                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                                (tw, th), _ = cv2.getTextSize(lbl, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
-                                cv2.rectangle(frame, (x1, y1-20), (x1+tw, y1), color, -1)
-                                cv2.putText(frame, lbl, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,0), 2)
-                                
+                    self._analyze_frame(frame, frame_idx, detections, w_out, counters, update_callback, draw=out is not None)
                 except Exception as e:
                     logger.error(f"Frame {frame_idx} Inference Failed: {e}")
                     
-                out.write(frame)
-                
-                # Cleanup Old Tracks & Write Best Result
-                for tid, v in self.tracks.items():
-                    if tid not in frame_ids and v.locked and not v.csv_written:
-                        if (frame_idx - v.last_seen_frame) > 15:
-                            with open(output_csv_path, 'a', newline='') as f:
-                                # Write BEST and INITIAL
-                                csv.writer(f).writerow([v.type_str, v.color, v.best_plate, v.initial_plate, f"{v.best_conf:.2f}", frame_idx])
-                                v.csv_written = True
-
-            # Final Flush
-            for tid, v in self.tracks.items():
-                if v.locked and not v.csv_written:
-                    with open(output_csv_path, 'a', newline='') as f:
-                        csv.writer(f).writerow([v.type_str, v.color, v.best_plate, v.initial_plate, f"{v.best_conf:.2f}", frame_idx])
-                        v.csv_written = True
+                if write:
+                    if timeline is not None: put = self._put_timed(pipe, encode_q, frame, position, timeline)
+                    else: put = pipe.put(encode_q, frame)
+                    if not put: break
+                self._retire_tracks(frame_idx, sink)
+                if checkpoints is not None and frame_idx in checkpoints:
+                    stages = checkpoints.pop(frame_idx)
+                    if timeline is not None: stages["video_timeline"] = dict(timeline)
+                    if not self._checkpoint(pipe, encode_q, out, ckpt_path, job_key, frame_idx, counters, sink,
+                                            stages): break
+
+            if out is not None: pipe.put(encode_q, SENTINEL)
+            pipe.join()
+
+            # Final Flush (after every in-flight OCR result is merged)
+            self._collect_ocr(wait=True)
+            self.ocr_stats.save()
+            for v in self.tracks.unwritten():
+                self._write_result(v, frame_idx, sink)
+            counters["analyzed_frames"] = sampler.analyzed
+            counters["detector"] = backend
+            counters["inference_seconds"] = round(self._infer_seconds, 2)
+            if self._detection_log is not None: self._detection_log.save(frame_idx)
+            if out is not None:
+                # Raises if the encoder failed, so the job errors instead of linking a broken video
+                out.release()
+                if isinstance(out, PartedVideoWriter): out.finish()
+            if ckpt_path: remove_checkpoint(ckpt_path)
+            print(f"DEBUG: Analyzed {sampler.analyzed}/{frame_idx} frames ({sampler.active_frames} with motion)")
 
         except Exception as main_e:
             logger.error(f"Critical Processing Error: {main_e}")
+            if ckpt_path: remove_checkpoint(ckpt_path)   # A failed job is not resumed
             raise main_e
         finally:
+            pipe.abort()
+            pipe.join(raise_errors=False)
             print(f"DEBUG: Finalizing Video. Total Frames: {frame_idx}")
             cap.release()
-            out.release()
-            
+            if out is not None:
+                try:
+                    out.release()
+                except Exception as e:
+                    logger.error(f"Video Writer Release Failed: {e}")
+            if result_sink is None: sink.close()
+            else: sink.flush()
+
+        return counters
+
+    def process_stream(self, source, output_path=None, update_callback=None, row_callback=None, frame_callback=None,
+                       stop_event=None, precision=None, roi=None, loop=False, max_seconds=None, result_sink=None):
+        """
+        Analyzes a live source (RTSP/HTTP URL, device index or a video file standing in for a camera,
+        see live_stream.LiveSource) until stop_event is set, max_seconds have passed or the source ends.
+        Always the newest frame is analyzed, at most every frame_skip-th; frames that arrive while the
+        previous one is still being analyzed are dropped. Counters go to update_callback about once a
+        second (and on every count) with stream stats: drop rate, end-to-end latency (source to result)
+        against the stream_latency_ms target. Rows go to row_callback as tracks retire, and to
+        result_sink / a sink on output_path (frame = source frame number since the stream started).
+        Returns the final counters.
+        """
+        from live_stream import LiveSource
+        model, backend = self.detector(precision)
+        for tracker in getattr(getattr(model, "predictor", None), "trackers", ()): tracker.reset()
+        self._infer_seconds = 0.0
+        target = self.settings["stream_latency_ms"] / 1000.0
+        live = LiveSource(source, loop=loop, max_lag=target, reconnect_seconds=self.settings["stream_reconnect_seconds"])
+        live.start()
+
+        w_orig, h_orig = live.size
+        scale = 1.0
+        if w_orig > 1920:
+            scale = 1920 / w_orig
+            w_out, h_out = 1920, int(h_orig * scale)
+        else:
+            w_out, h_out = w_orig, h_orig
+        self._roi = RegionOfInterest(roi, (w_out, h_out)) if roi else None
+
+        # Track expiry runs on a nominal clock of frame_skip per analyzed frame, so dropped frames
+        # don't retire tracks early (a stream has no fixed analysis rate)
+        stride = max(1, self.settings["frame_skip"])
+        self.tracks = TrackStore(expire_after=max(15, EXPIRE_STRIDES * stride),
+                                 forget_after=max(self.settings["track_forget_frames"], (TRACKER_BUFFER + 1) * stride))
+        self._ocr_inflight = set()
+        self._ocr_order = self._variant_order()
+        self._detection_log = None
+        sink = result_sink
+        if sink is None and output_path:
+            sink = open_sink(output_path, flush_rows=self.settings["sink_flush_rows"], flush_seconds=self.settings["sink_flush_seconds"])
+
+        def emit(v, seq):
+            row = result_row(v, seq)
+            v.csv_written = True
+            if sink is not None: sink.write(row)
+            if row_callback: row_callback(row)
+
+        counters = {"total": 0, "cars": 0, "bikes": 0, "trucks": 0}
+        latencies = deque(maxlen=200)   # Recent end-to-end latencies (s)
+        analyzed = dropped = late = 0
+        clock = seq = last_seq = 0
+        started = last_report = time.monotonic()
+
+        def report():
+            counters.update(live.stats(), analyzed_frames=analyzed, dropped_frames=dropped,
+                            drop_rate=round(dropped / (analyzed + dropped), 3) if analyzed + dropped else 0.0,
+                            late_frames=late, latency_target_ms=self.settings["stream_latency_ms"],
+                            analysis_fps=round(analyzed / max(time.monotonic() - started, 1e-6), 2),
+                            inference_seconds=round(self._infer_seconds, 2), detector=backend)
+            if latencies:
+                p50, p95 = np.percentile(latencies, [50, 95])
+                counters.update(latency_ms=int(p50 * 1000), latency_p95_ms=int(p95 * 1000))
+
+        try:
+            while not (stop_event is not None and stop_event.is_set()):
+                if max_seconds is not None and time.monotonic() - started >= max_seconds: break
+                item = live.read(min_seq=last_seq + stride, timeout=0.5)
+                if item is None:
+                    if live.ended: break
+                    continue
+                seq, frame, born = item
+                # Analysis frames we would have taken at a fixed frame_skip, but the previous one was still running
+                if last_seq: dropped += max(0, (seq - last_seq) // stride - 1)
+                last_seq = seq
+                clock += stride
+                if scale != 1.0: frame = cv2.resize(frame, (w_out, h_out))
+
+                t = time.perf_counter()
+                try:
+                    detections = self._track_frames([frame], model)[0]
+                except Exception as e:
+                    logger.error(f"Stream frame {seq} Inference Failed: {e}")
+                    detections = None
+                self._infer_seconds += time.perf_counter() - t
+                self._collect_ocr()
+                try:
+                    self._analyze_frame(frame, clock, detections, w_out, counters, update_callback, draw=frame_callback is not None)
+                except Exception as e:
+                    logger.error(f"Stream frame {seq} Analysis Failed: {e}")
+                for v in self.tracks.expire(clock):
+                    emit(v, seq)
+                analyzed += 1
+                latency = time.monotonic() - born
+                latencies.append(latency)
+                if latency > target: late += 1
+                if frame_callback: frame_callback(frame)
+
+                if time.monotonic() - last_report >= 1.0:
+                    last_report = time.monotonic()
+                    report()
+                    if sink is not None: sink.flush()   # Rows show up within a second, even on a quiet road
+                    if update_callback: update_callback(counters)
+
+            # Final Flush (after every in-flight OCR result is merged)
+            self._collect_ocr(wait=True)
+            self.ocr_stats.save()
+            for v in self.tracks.unwritten():
+                emit(v, seq)
+            report()
+            print(f"DEBUG: Stream stopped after {analyzed} analyzed frames: {counters}")
+        finally:
+            live.stop()
+            if sink is not None:
+                if result_sink is None: sink.close()
+                else: sink.flush()
         return counters
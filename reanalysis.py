@@ -0,0 +1,113 @@
+import time
+import argparse
+
+import cv2
+
+from processor import DEFAULT_SETTINGS, VehicleData, count_vehicle, draw_vehicle, result_row
+from detection_log import DetectionLog
+from track_store import TrackStore
+from result_sinks import open_sink
+from vehicle_color import ColorClassifier
+from video_writer import open_video_writer
+
+def reanalyze(log_path, output_csv_path, video_path=None, output_video_path=None, count_sightings=None,
+              expire_after=None, update_callback=None, **settings):
+    """
+    Recomputes counts and vehicle rows of a finished job from its detection log (no YOLO, no OCR).
+    Plates come from the log. With `video_path` (the source video) colors are classified again
+    from the pixels, and with `output_video_path` as well the overlay is re-rendered.
+    Returns the counters, like SITAProcessor.process_video.
+    """
+    settings = {**DEFAULT_SETTINGS, **settings}
+    log = DetectionLog(log_path)
+    meta = log.meta
+    count_sightings = count_sightings or meta["count_sightings"]
+    known = log.tracks()
+    tracks = TrackStore(expire_after=expire_after or meta["expire_after"], forget_after=meta["forget_after"])
+    counters = {"total": 0, "cars": 0, "bikes": 0, "trucks": 0, "progress": 0}
+
+    cap = out = classifier = None
+    size = (meta["width"], meta["height"])
+    if video_path:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened(): raise ValueError("Video Error")
+        classifier = ColorClassifier(max_pixels=settings["color_max_pixels"])
+        if output_video_path:
+            out = open_video_writer(output_video_path, meta["fps"], size, settings)
+    video_idx = 0
+
+    def next_frame(write):
+        """Reads the next source frame at log resolution; writes it to the re-rendered video if asked."""
+        nonlocal video_idx
+        ret, frame = cap.read()
+        if not ret: return None
+        video_idx += 1
+        if (frame.shape[1], frame.shape[0]) != size: frame = cv2.resize(frame, size)
+        if write and out is not None: out.write(frame)
+        return frame
+
+    t = time.perf_counter()
+    sink = open_sink(output_csv_path, flush_rows=settings["sink_flush_rows"], flush_seconds=settings["sink_flush_seconds"])
+    try:
+        for i, (frame_idx, detections) in enumerate(log):
+            frame = None
+            if cap is not None:
+                while video_idx < frame_idx - 1:
+                    if next_frame(write=True) is None: break
+                frame = next_frame(write=False)
+
+            drawn = []
+            if detections is not None:
+                for box, tid, cid in zip(*detections[:3]):
+                    tid = int(tid)
+                    v = tracks.get(tid)
+                    if v is None:
+                        v = VehicleData(int(cid))
+                        tracks.add(tid, v)
+                    v.frames_seen += 1
+                    tracks.touch(tid, frame_idx)
+                    x1, y1, x2, y2 = map(int, box)
+
+                    if not v.locked and v.frames_seen == count_sightings:
+                        v.locked = True
+                        if tid in known:
+                            _, v.color, v.best_plate, v.initial_plate, v.best_conf = known[tid]
+                        if frame is not None:
+                            v.color = classifier.classify(frame[y1:y2, x1:x2])
+                        count_vehicle(v, counters)
+                    drawn.append((v, x1, y1, x2, y2))
+
+            if frame is not None and out is not None:
+                for v, x1, y1, x2, y2 in drawn: draw_vehicle(frame, v, x1, y1, x2, y2)
+                out.write(frame)
+            for v in tracks.expire(frame_idx):
+                sink.write(result_row(v, frame_idx))
+                v.csv_written = True
+            if update_callback and i % 100 == 0:
+                counters["progress"] = min(99, int(100 * i / max(1, len(log))))
+                update_callback(counters)
+
+        if cap is not None:
+            while next_frame(write=True) is not None: pass
+        for v in tracks.unwritten():
+            sink.write(result_row(v, log.last_frame))
+        counters["progress"] = 100
+    finally:
+        sink.close()
+        if cap is not None: cap.release()
+        if out is not None: out.release()
+
+    print(f"DEBUG: Re-analyzed {len(log)} frames in {time.perf_counter() - t:.2f}s: {counters}")
+    return counters
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute counts/CSV (and optionally the overlay) from a detection log.")
+    parser.add_argument("log", help="<job>_detections.npz written by process_video")
+    parser.add_argument("csv", help="Output CSV (or .ndjson / .db)")
+    parser.add_argument("--video", help="Source video: re-classify colors from its pixels")
+    parser.add_argument("--render", help="Re-rendered annotated video (needs --video)")
+    parser.add_argument("--sightings", type=int, help="Sightings before a vehicle is counted (default: as logged)")
+    parser.add_argument("--expire", type=int, help="Unseen frames before a vehicle's row is written (default: as logged)")
+    args = parser.parse_args()
+    if args.render and not args.video: parser.error("--render needs --video")
+    reanalyze(args.log, args.csv, args.video, args.render, args.sightings, args.expire)
@@ -0,0 +1,154 @@
+import os
+import csv
+import json
+import time
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Updated Header for Dual Plate Tracking
+RESULT_COLUMNS = ["vehicle_type", "color", "number_plate", "initial_plate", "confidence", "frame"]
+
+class ResultSink:
+    """
+    Destination for one job's per-vehicle rows, kept open for the whole job.
+    Rows are (vehicle_type, color, number_plate, initial_plate, confidence, frame) tuples.
+    They are buffered and flushed every `flush_rows` rows or `flush_seconds` seconds, and at close().
+    position() marks where the rows so far end; a sink opened with resume_at=<position> drops anything
+    written after that mark and continues from it (checkpointed jobs, see checkpoint.py).
+    """
+    def __init__(self, flush_rows=200, flush_seconds=2.0):
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.rows_written = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def write(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._write_rows(self._buffer)
+            self.rows_written += len(self._buffer)
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def position(self):
+        self.flush()
+        return self._position()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._close()
+
+    def _write_rows(self, rows):
+        raise NotImplementedError
+
+    def _position(self):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _reopen(path, offset, newline=None):
+    """Opens a result file for appending at `offset`, cutting off what was written after it."""
+    f = open(path, 'r+', newline=newline)
+    f.seek(offset)
+    f.truncate()
+    return f
+
+class CSVSink(ResultSink):
+    def __init__(self, path, resume_at=None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        if resume_at is not None:
+            self._file = _reopen(path, resume_at, newline='')
+            self._writer = csv.writer(self._file)
+            return
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(RESULT_COLUMNS)
+        self._file.flush()
+
+    def _write_rows(self, rows):
+        self._writer.writerows([(t, c, p, i, f"{conf:.2f}", frame) for (t, c, p, i, conf, frame) in rows])
+        self._file.flush()
+
+    def _position(self):
+        return self._file.tell()
+
+    def _close(self):
+        self._file.close()
+
+class NDJSONSink(ResultSink):
+    def __init__(self, path, resume_at=None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._file = _reopen(path, resume_at) if resume_at is not None else open(path, 'w')
+
+    def _write_rows(self, rows):
+        for (t, c, p, i, conf, frame) in rows:
+            record = dict(zip(RESULT_COLUMNS, (t, c, p, i, round(conf, 2), frame)))
+            self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def _position(self):
+        return self._file.tell()
+
+    def _close(self):
+        self._file.close()
+
+class SQLiteSink(ResultSink):
+    def __init__(self, path, table="vehicle_results", job_id=None, resume_at=None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.table = table
+        self.job_id = job_id
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                job_id TEXT,
+                vehicle_type TEXT,
+                color TEXT,
+                number_plate TEXT,
+                initial_plate TEXT,
+                confidence REAL,
+                frame INTEGER
+            )
+        ''')
+        if resume_at is not None:
+            self._conn.execute(f'DELETE FROM {table} WHERE job_id IS ? AND rowid > ?', (job_id, resume_at))
+        self._conn.commit()
+
+    def _write_rows(self, rows):
+        self._conn.executemany(
+            f'INSERT INTO {self.table} (job_id, vehicle_type, color, number_plate, initial_plate, confidence, frame) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(self.job_id, t, c, p, i, round(conf, 2), frame) for (t, c, p, i, conf, frame) in rows])
+        self._conn.commit()
+
+    def _position(self):
+        return self._conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM {self.table}').fetchone()[0]
+
+    def _close(self):
+        self._conn.close()
+
+def open_sink(path, **kwargs):
+    """Picks the sink from the file extension: .ndjson/.jsonl, .db/.sqlite/.sqlite3, otherwise CSV."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".ndjson", ".jsonl"):
+        return NDJSONSink(path, **kwargs)
+    if ext in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteSink(path, **kwargs)
+    return CSVSink(path, **kwargs)
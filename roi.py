@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+
+def normalize_polygon(points):
+    """
+    Validates an ROI polygon given as [[x, y], ...] in frame-relative coordinates (0..1).
+    Returns it as a list of [float, float]; raises ValueError if it is not a usable polygon.
+    """
+    try:
+        poly = [[float(x), float(y)] for x, y in points]
+    except (TypeError, ValueError):
+        raise ValueError("ROI points must be a list of [x, y] pairs")
+    if len(poly) < 3:
+        raise ValueError("ROI polygon needs at least 3 points")
+    if any(not (0.0 <= c <= 1.0) for p in poly for c in p):
+        raise ValueError("ROI coordinates must be fractions of the frame size (0..1)")
+    if cv2.contourArea(np.asarray(poly, np.float32)) <= 0:
+        raise ValueError("ROI polygon has no area")
+    return poly
+
+class RegionOfInterest:
+    """
+    Inference area of one camera for frames of `size` (w, h).
+    Detection runs on the bounding crop of the polygon only (so the detector's 640px input covers fewer
+    source pixels), and a detection is kept only if its ground point, the bottom centre of the box,
+    lies inside the polygon. Boxes are in crop coordinates until to_frame().
+    """
+    def __init__(self, points, size, pad=16):
+        w, h = size
+        poly = np.round(np.asarray(normalize_polygon(points), np.float32) * (w, h)).astype(np.int32)
+        x, y, bw, bh = cv2.boundingRect(poly)
+        self.x0, self.y0 = max(0, x - pad), max(0, y - pad)
+        self.x1, self.y1 = min(w, x + bw + pad), min(h, y + bh + pad)
+        self.polygon = poly
+        # Inside test is a lookup in this crop-sized mask
+        self.mask = np.zeros((self.y1 - self.y0, self.x1 - self.x0), np.uint8)
+        cv2.fillPoly(self.mask, [poly - (self.x0, self.y0)], 1)
+
+    @property
+    def crop_size(self):
+        return self.x1 - self.x0, self.y1 - self.y0
+
+    def crop(self, frame):
+        return frame[self.y0:self.y1, self.x0:self.x1]
+
+    def inside(self, boxes):
+        """Boolean keep-mask for Nx4 xyxy boxes in crop coordinates."""
+        h, w = self.mask.shape
+        cx = np.clip(((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int64), 0, w - 1)
+        cy = np.clip(boxes[:, 3].astype(np.int64), 0, h - 1)
+        return self.mask[cy, cx].astype(bool)
+
+    def to_frame(self, boxes):
+        return boxes + np.asarray([self.x0, self.y0, self.x0, self.y0], boxes.dtype)
@@ -0,0 +1,203 @@
+import os
+import time
+import queue
+import shutil
+import logging
+import tempfile
+import multiprocessing
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import cv2
+import numpy as np
+
+from processor import DEFAULT_SETTINGS, detection_log_path
+from detection_log import DetectionLog, DetectionLogWriter
+from reanalysis import reanalyze
+from video_writer import concat_videos
+
+logger = logging.getLogger(__name__)
+
+def segment_count(video_path, settings):
+    """Segments to split a video into (1 = process it in one piece): long recordings only."""
+    segments = max(1, int(settings["segments"]))
+    if segments == 1: return 1
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if frames <= 0 or frames / fps < settings["segment_min_seconds"]: return 1
+    return segments
+
+def plan_segments(total_frames, segments, overlap, align=1):
+    """
+    [(start_frame, end_frame, warmup_frames)]: segment k owns frames start+1 .. end.
+    Boundaries and the warmup overlap are multiples of `align` (the frame skip), so analysis
+    frames fall where they would in a single pass. The last segment reads to the end of the file.
+    """
+    size = -(-total_frames // segments)
+    size = -(-size // align) * align
+    overlap = -(-overlap // align) * align
+    starts = list(range(0, total_frames, size))
+    return [(s, starts[i + 1] if i + 1 < len(starts) else None, min(overlap, s)) for i, s in enumerate(starts)]
+
+_segment_processor = None
+
+def _init_segment_worker(settings):
+    global _segment_processor
+    from processor import SITAProcessor
+    _segment_processor = SITAProcessor(**settings)
+
+def _run_segment(k, video_path, csv_path, video_out, segment, precision, roi, progress_q):
+    start, end, warmup = segment
+    callback = (lambda counters: progress_q.put((k, dict(counters)))) if progress_q is not None else None
+    return _segment_processor.process_video(video_path, csv_path, video_out, update_callback=callback, precision=precision,
+                                            roi=roi, start_frame=start, end_frame=end, warmup_frames=warmup)
+
+def _iou(a, b):
+    """IoU matrix of Nx4 and Mx4 xyxy boxes."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+def match_tracks(prev_frames, next_frames, min_iou=0.5):
+    """
+    {next_tid: prev_tid} for tracks of two segments seen on the same frames (the overlap).
+    Each frame's boxes vote for a pairing when their IoU is at least min_iou; pairs are then
+    taken one-to-one, most votes first.
+    """
+    votes = {}
+    for frame_idx, (boxes_b, ids_b) in next_frames.items():
+        if frame_idx not in prev_frames: continue
+        boxes_a, ids_a = prev_frames[frame_idx]
+        iou = _iou(boxes_a, boxes_b)
+        for i, j in zip(*np.nonzero(iou >= min_iou)):
+            key = (int(ids_b[j]), int(ids_a[i]))
+            votes[key] = votes.get(key, 0) + iou[i, j]
+    matched, taken = {}, set()
+    for (b, a), _ in sorted(votes.items(), key=lambda kv: -kv[1]):
+        if b in matched or a in taken: continue
+        matched[b] = a
+        taken.add(a)
+    return matched
+
+def _frames_between(log, lo, hi):
+    """{frame_idx: (boxes, ids)} of a log's frames lo+1 .. hi that have detections."""
+    return {f: (d[0], d[1]) for f, d in log if d is not None and lo < f <= hi}
+
+def stitch_logs(logs, plan, path):
+    """
+    Merges the segments' detection logs into one log for the whole video, under global track IDs.
+    Each frame comes from the segment that owns it; a track that crosses a boundary is matched
+    to its counterpart on the frames both segments analyzed, and keeps one ID. Per track, the
+    segment result with the best plate confidence is kept. Returns the number of stitched tracks.
+    """
+    meta = {k: v for k, v in logs[0].meta.items() if k not in ("version", "last_frame")}
+    writer = DetectionLogWriter(path, **meta)
+    gids = {}           # (segment, tid) -> global id
+    stitched = 0
+
+    def gid(k, tid):
+        key = (k, tid)
+        if key not in gids: gids[key] = len(gids)
+        return gids[key]
+
+    for k, log in enumerate(logs):
+        start, end, warmup = plan[k]
+        if k > 0:
+            prev = _frames_between(logs[k - 1], start - warmup, start)
+            for b, a in match_tracks(prev, _frames_between(log, start - warmup, start)).items():
+                if (k - 1, a) in gids:
+                    gids[(k, b)] = gids[(k - 1, a)]
+                    stitched += 1
+        for frame_idx, dets in log:
+            if frame_idx <= start or (end is not None and frame_idx > end): continue
+            if dets is not None:
+                boxes, ids, clss, confs = dets
+                dets = (boxes, np.asarray([gid(k, int(t)) for t in ids], np.int64), clss, confs)
+            writer.add_frame(frame_idx, dets)
+
+    best = {}
+    for k, log in enumerate(logs):
+        for tid, (cls_id, color, plate, initial, conf) in log.tracks().items():
+            if (k, tid) not in gids: continue   # Only seen in another segment's frames
+            g = gids[(k, tid)]
+            if g not in best or conf > best[g].best_conf:
+                best[g] = SimpleNamespace(seq=g, cls_id=cls_id, color=color, best_plate=plate, initial_plate=initial,
+                                          best_conf=conf)
+    for g, v in best.items():
+        writer.add_track(g, v)
+    writer.save(logs[-1].last_frame)
+    return stitched
+
+def process_video_segmented(video_path, output_csv_path, output_video_path, update_callback=None,
+                            precision=None, roi=None, **settings):
+    """
+    Processes one long video as `segments` (setting) time segments in parallel worker processes (one
+    SITAProcessor each), then stitches tracks across the boundaries so a vehicle crossing one is
+    counted once. Each segment after the first starts `segment_overlap_frames` early to warm up
+    its tracker; tracks are matched on those shared frames. Counts and rows are recomputed from
+    the stitched detection log (as in reanalysis.py); the segment videos are concatenated.
+    Returns the counters, like SITAProcessor.process_video.
+    """
+    settings = {**DEFAULT_SETTINGS, **settings}
+    t = time.perf_counter()
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened(): raise ValueError("Video Error")
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    plan = plan_segments(total_frames, max(1, int(settings["segments"])), settings["segment_overlap_frames"], settings["frame_skip"])
+    print(f"DEBUG: Processing {video_path} as {len(plan)} segments: {plan}")
+
+    # Segments own the cores: no OCR pool per segment, and the detection log is what gets stitched
+    # (and no checkpoints: an interrupted segmented job starts over)
+    segment_settings = {**settings, "detection_log": True, "ocr_workers": 0, "checkpoint_seconds": 0}
+    with_video = settings["video_output"] != "none"
+    tmp = tempfile.mkdtemp(prefix="sita_segments_", dir=os.path.dirname(os.path.abspath(output_csv_path)))
+    try:
+        csvs = [os.path.join(tmp, f"segment{k}.csv") for k in range(len(plan))]
+        videos = [os.path.join(tmp, f"segment{k}{os.path.splitext(output_video_path or '.webm')[1]}") for k in range(len(plan))]
+        ctx = multiprocessing.get_context("spawn")
+        manager = ctx.Manager() if update_callback else None
+        progress_q = manager.Queue() if manager else None
+        partial = {}
+        with ProcessPoolExecutor(len(plan), mp_context=ctx, initializer=_init_segment_worker,
+                                 initargs=(segment_settings,)) as pool:
+            futures = [pool.submit(_run_segment, k, video_path, csvs[k], videos[k], segment, precision, roi, progress_q)
+                       for k, segment in enumerate(plan)]
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+                if progress_q is None: continue
+                try:
+                    while True:
+                        k, counters = progress_q.get_nowait()
+                        partial[k] = counters
+                except queue.Empty:
+                    pass
+                # Provisional: plain sums (a vehicle on a boundary may be in two segments until stitching)
+                combined = {key: sum(c.get(key, 0) for c in partial.values()) for key in ("total", "cars", "bikes", "trucks")}
+                combined["progress"] = min(95, int(sum(c.get("progress", 0) for c in partial.values()) / len(plan)))
+                update_callback(combined)
+            results = [f.result() for f in futures]
+        if manager: manager.shutdown()
+
+        logs = [DetectionLog(detection_log_path(c)) for c in csvs]
+        merged_log = detection_log_path(output_csv_path) if settings["detection_log"] else os.path.join(tmp, "merged_detections.npz")
+        stitched = stitch_logs(logs, plan, merged_log)
+        counters = reanalyze(merged_log, output_csv_path, **settings)
+        if with_video and output_video_path:
+            concat_videos(videos, output_video_path, settings)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    counters.update(analyzed_frames=sum(r["analyzed_frames"] for r in results), detector=results[0]["detector"],
+                    inference_seconds=round(sum(r["inference_seconds"] for r in results), 2), segments=len(plan),
+                    stitched_tracks=stitched)
+    print(f"DEBUG: Segmented processing done in {time.perf_counter() - t:.2f}s: {counters}")
+    return counters
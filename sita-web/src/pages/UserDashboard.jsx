@@ -43,6 +43,10 @@ const UserDashboard = () => {
         const saved = localStorage.getItem(STORAGE_KEY);
         return saved ? JSON.parse(saved).reportData : [];
     });
+    const [jobId, setJobId] = useState(() => {
+        const saved = localStorage.getItem(STORAGE_KEY);
+        return saved ? JSON.parse(saved).jobId : null;
+    });
     const [filterText, setFilterText] = useState('');
 
     // Persist State Changes
@@ -52,37 +56,75 @@ const UserDashboard = () => {
             videoLink,
             processingStatus,
             uploadProgress,
-            reportData
+            reportData,
+            jobId
         };
         localStorage.setItem(STORAGE_KEY, JSON.stringify(stateToSave));
-    }, [isAnalyzing, videoLink, processingStatus, uploadProgress, reportData]);
+    }, [isAnalyzing, videoLink, processingStatus, uploadProgress, reportData, jobId]);
+
+    const finishJob = async (data) => {
+        if (data.status === 'complete') {
+            setProcessingStatus('complete');
+            setUploadProgress(100);
+            setVideoLink(data.video_link);
+            // Fetch Report
+            const report = await apiRequest(jobId ? `/traffic_report?job_id=${jobId}` : '/traffic_report', 'GET', null, user.email);
+            if (report && report.data) setReportData(report.data);
+            setIsAnalyzing(false);
+            showToast("ANALYSIS COMPLETE", "success");
+        } else {
+            setProcessingStatus('idle');
+            setIsAnalyzing(false);
+            showToast(data.error || "ANALYSIS FAILED", "error");
+        }
+    };
 
-    // Poll for status if processing
+    // Live progress of our job over Server-Sent Events (pushed by the server, no polling)
+    const [streamFailed, setStreamFailed] = useState(false);
+    useEffect(() => {
+        if (!jobId || streamFailed || !window.EventSource) return;
+        if (processingStatus !== 'uploading' && processingStatus !== 'processing') return;
+        const source = new EventSource(`${API_BASE}/api/status/stream?job_id=${jobId}&email=${encodeURIComponent(user.email)}`);
+        const onState = (e) => {
+            const data = JSON.parse(e.data);
+            setProcessingStatus('processing');
+            if (data.counters && data.counters.progress) setUploadProgress(data.counters.progress);
+        };
+        const onProgress = (e) => {
+            const { counters } = JSON.parse(e.data);
+            if (counters.progress !== undefined) setUploadProgress(counters.progress);
+        };
+        const onFinal = (e) => {
+            source.close();
+            finishJob(JSON.parse(e.data));
+        };
+        source.addEventListener('state', onState);
+        source.addEventListener('progress', onProgress);
+        source.addEventListener('done', onFinal);
+        // Stream not available (network, proxy, older server): fall back to polling
+        source.onerror = () => {
+            source.close();
+            setStreamFailed(true);
+        };
+        return () => source.close();
+    }, [processingStatus, jobId, streamFailed]);
+
+    // Poll for status if processing (no job id yet, or no SSE)
     useEffect(() => {
         let interval;
+        if (jobId && !streamFailed && window.EventSource) return;
         if (processingStatus === 'uploading' || processingStatus === 'processing') {
             interval = setInterval(async () => {
                 try {
-                    const data = await apiRequest('/status', 'GET', null, user.email);
+                    // Our own job (other operators' uploads run alongside)
+                    const data = await apiRequest(jobId ? `/status?job_id=${jobId}` : '/status', 'GET', null, user.email);
                     if (data && data.status) {
-                        if (data.status === 'processing') {
+                        if (data.status === 'queued' || data.status === 'processing') {
                             setProcessingStatus('processing');
                             setUploadProgress((prev) => (prev < 90 ? prev + 1 : prev)); // Fake progress to 90
-                        } else if (data.status === 'complete') {
-                            setProcessingStatus('complete');
-                            setUploadProgress(100);
-                            setVideoLink(data.video_link);
-                            clearInterval(interval);
-                            // Fetch Report
-                            const report = await apiRequest('/traffic_report', 'GET', null, user.email);
-                            if (report && report.data) setReportData(report.data);
-                            setIsAnalyzing(false);
-                            showToast("ANALYSIS COMPLETE", "success");
-                        } else if (data.status === 'error') {
-                            setProcessingStatus('idle');
-                            setIsAnalyzing(false);
+                        } else if (data.status === 'complete' || data.status === 'error' || data.status === 'interrupted') {
                             clearInterval(interval);
-                            showToast(data.error || "ANALYSIS FAILED", "error");
+                            finishJob(data);
                         }
                     }
                 } catch (e) {
@@ -91,7 +133,7 @@ const UserDashboard = () => {
             }, 2000);
         }
         return () => clearInterval(interval);
-    }, [processingStatus]);
+    }, [processingStatus, jobId, streamFailed]);
 
     const handleFileUpload = async (event) => {
         const file = event.target.files[0];
@@ -103,6 +145,8 @@ const UserDashboard = () => {
         // Reset old data
         setReportData([]);
         setVideoLink(null);
+        setJobId(null);
+        setStreamFailed(false);
 
         const formData = new FormData();
         formData.append('video', file);
@@ -124,12 +168,19 @@ const UserDashboard = () => {
                 if (xhr.status === 200) {
                     const response = JSON.parse(xhr.responseText);
                     if (response.success) {
+                        setJobId(response.job_id);
                         setProcessingStatus('processing');
                         setUploadProgress(0); // Reset for processing phase
                         showToast("UPLOAD COMPLETE. ANALYZING...", "info");
                     } else {
                         throw new Error(response.error || "Upload failed");
                     }
+                } else if (xhr.status === 503) {
+                    // Processing engine still loading its models after a cold start
+                    const retryAfter = xhr.getResponseHeader('Retry-After') || 5;
+                    setProcessingStatus('idle');
+                    setIsAnalyzing(false);
+                    showToast(`ENGINE WARMING UP. RETRY IN ${retryAfter}s.`, "error");
                 } else {
                     throw new Error("Upload failed with status " + xhr.status);
                 }
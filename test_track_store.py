@@ -0,0 +1,52 @@
+from concurrent.futures import Future
+
+from track_store import TrackStore
+from processor import SITAProcessor, VehicleData
+
+def pending_track(store, tid, frame_idx, locked=True, csv_written=False):
+    v = VehicleData(2)
+    v.locked, v.csv_written = locked, csv_written
+    store.add(tid, v)
+    store.touch(tid, frame_idx)
+    future = Future()
+    v.pending_ocr = [(future, 0)]
+    return v, future
+
+def ocr_only_processor(store):
+    processor = SITAProcessor.__new__(SITAProcessor)
+    processor.tracks = store
+    processor._ocr_inflight = set(store.live)
+    processor.ocr_stats = type("Stats", (), {"record": lambda self, variant: None})()
+    return processor
+
+def test_pending_ocr_holds_every_track():
+    # Written (revived) and uncounted tracks can have OCR in flight too; none may be retired under it
+    for locked, csv_written in ((True, True), (False, False), (True, False)):
+        store = TrackStore(expire_after=15)
+        v, future = pending_track(store, 7, 10, locked, csv_written)
+        assert store.expire(30) == []
+        assert 7 in store.live
+
+        future.set_result([("MH01DE2780", 0.9, 0)])
+        processor = ocr_only_processor(store)
+        processor._collect_ocr()
+        assert v.best_plate == "MH01DE2780"
+        assert not processor._ocr_inflight
+
+        written = store.expire(31)
+        assert written == ([v] if locked and not csv_written else [])
+        assert 7 in store.retired
+
+def test_collect_ocr_skips_forgotten_tracks():
+    store = TrackStore(expire_after=15, forget_after=30)
+    v, future = pending_track(store, 7, 10)
+    processor = ocr_only_processor(store)
+    store.live.pop(7)
+    future.set_result([("MH01DE2780", 0.9, 0)])
+    processor._collect_ocr(wait=True)
+    assert not processor._ocr_inflight
+
+if __name__ == "__main__":
+    test_pending_ocr_holds_every_track()
+    test_collect_ocr_skips_forgotten_tracks()
+    print("TrackStore OK")
@@ -0,0 +1,84 @@
+from collections import deque
+
+class TrackStore:
+    """
+    Tracks of one job, split into a hot dict of live tracks and a cold dict of retired ones.
+    Expiry is driven by a FIFO of (last_seen_frame, tid) sightings. Frames only move forward,
+    so the queue stays sorted and each frame only pops what actually expired.
+    Per-frame cost therefore scales with active vehicles, not with video length.
+    """
+    def __init__(self, expire_after=15, forget_after=600):
+        self.expire_after = expire_after   # Unseen frames before a track is retired (CSV row written)
+        self.forget_after = forget_after   # Unseen frames before a retired track is dropped entirely
+        self.live = {}
+        self.retired = {}
+        self._expiry = deque()   # (last_seen_frame, tid); stale entries are skipped on pop
+        self._forget = deque()   # (retired_at_frame, tid)
+        self._held = set()       # Expired and counted, but OCR still in flight
+        self._seq = 0
+
+    def __len__(self):
+        return len(self.live)
+
+    def get(self, tid):
+        """Live track for tid, or None. A retired track whose ID the tracker revives comes back to life."""
+        v = self.live.get(tid)
+        if v is None and tid in self.retired:
+            v = self.live[tid] = self.retired.pop(tid)
+        return v
+
+    def add(self, tid, v):
+        v.seq = self._seq  # First-seen order, used for deterministic row order
+        v.tid = tid
+        self._seq += 1
+        self.live[tid] = v
+
+    def touch(self, tid, frame_idx):
+        self.live[tid].last_seen_frame = frame_idx
+        self._expiry.append((frame_idx, tid))
+
+    def expire(self, frame_idx):
+        """
+        Retires tracks unseen for more than `expire_after` frames.
+        Returns the counted, not yet written ones (first-seen order); the caller writes their rows.
+        A track with OCR still in flight (counted or not, written or not) stays live until its results have landed.
+        """
+        due = set(self._held)
+        horizon = frame_idx - self.expire_after
+        while self._expiry and self._expiry[0][0] < horizon:
+            seen, tid = self._expiry.popleft()
+            v = self.live.get(tid)
+            if v is not None and v.last_seen_frame == seen:
+                due.add(tid)
+
+        to_write = []
+        for tid in sorted(due, key=lambda t: self.live[t].seq):
+            v = self.live[tid]
+            self._held.discard(tid)
+            if frame_idx - v.last_seen_frame <= self.expire_after:
+                continue  # Seen again while held
+            if v.pending_ocr:
+                self._held.add(tid)
+                continue
+            if v.locked and not v.csv_written:
+                to_write.append(v)
+            self._retire(tid, frame_idx)
+
+        while self._forget and frame_idx - self._forget[0][0] > self.forget_after:
+            _, tid = self._forget.popleft()
+            v = self.retired.get(tid)
+            if v is not None and frame_idx - v.last_seen_frame > self.forget_after:
+                del self.retired[tid]
+        return to_write
+
+    def find(self, tid):
+        """Track for tid, live or retired (without reviving it), or None once forgotten."""
+        return self.live.get(tid) or self.retired.get(tid)
+
+    def _retire(self, tid, frame_idx):
+        self.retired[tid] = self.live.pop(tid)
+        self._forget.append((frame_idx, tid))
+
+    def unwritten(self):
+        """Counted tracks without a row yet (first-seen order), for the final flush."""
+        return sorted((v for v in self.live.values() if v.locked and not v.csv_written), key=lambda v: v.seq)
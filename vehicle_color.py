@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+
+# HSV ranges per color (OpenCV scale: H 0-180, S/V 0-255). Ranges may overlap; a pixel counts for every match.
+COLOR_RANGES = {
+    "White": [((0, 0, 180), (180, 50, 255))],
+    "Black": [((0, 0, 0), (180, 255, 50))],
+    "Red":   [((0, 70, 50), (10, 255, 255)), ((170, 70, 50), (180, 255, 255))],
+    "Blue":  [((100, 150, 0), (140, 255, 255))],
+    "Gray":  [((0, 0, 50), (180, 50, 180))]
+}
+
+class ColorClassifier:
+    """
+    Dominant vehicle color in one vectorized pass.
+    Every HSV range is a box, so the range boundaries split HSV space into a small grid of
+    cells that are each entirely inside or outside every range. A per-channel lookup table
+    maps H, S and V to their (weighted) grid coordinate; summing the channels gives the cell
+    index, a histogram counts cells, and a precomputed cell -> color matrix turns that into
+    per-color pixel counts. Same counts as the per-range inRange/countNonZero loop.
+    Tables are built once per processor.
+    """
+    def __init__(self, ranges=COLOR_RANGES, min_share=0.3, default="Blue", max_pixels=0):
+        self.names = list(ranges)
+        self.min_share = min_share
+        self.default = default
+        # PERFORMANCE: Opt-in. Larger crops are sampled on a regular grid down to ~max_pixels (0 = every pixel,
+        # same labels as the inRange classifier); sampling can flip labels near the 30% share
+        self.max_pixels = max_pixels
+
+        # Cell edges per channel: every range starts a cell at `lo` and ends it after `hi` (inclusive, like inRange)
+        edges = []
+        for ch in range(3):
+            e = {0, 256}
+            for r_list in ranges.values():
+                for (low, high) in r_list:
+                    e.update((low[ch], min(high[ch] + 1, 256)))
+            edges.append(np.array(sorted(e)))
+        bins = [len(e) - 1 for e in edges]
+        weights = [bins[1] * bins[2], bins[2], 1]
+        self.n_cells = bins[0] * bins[1] * bins[2]
+        if self.n_cells > 256: raise ValueError("Too many HSV range boundaries for a uint8 cell index")
+
+        values = np.arange(256)
+        lut = np.zeros((256, 1, 3), np.uint8)
+        for ch in range(3):
+            lut[:, 0, ch] = (np.searchsorted(edges[ch], values, side='right') - 1) * weights[ch]
+        self.lut = lut
+        self.channel_sum = np.ones((1, 3), np.float32)
+
+        # Cell -> color membership, evaluated at each cell's lower corner
+        cells = np.arange(self.n_cells)
+        corner = [edges[ch][(cells // weights[ch]) % bins[ch]] for ch in range(3)]
+        self.membership = np.zeros((self.n_cells, len(self.names)), np.float32)
+        for k, name in enumerate(self.names):
+            for (low, high) in ranges[name]:
+                inside = np.ones(self.n_cells, bool)
+                for ch in range(3):
+                    inside &= (corner[ch] >= low[ch]) & (corner[ch] <= high[ch])
+                self.membership[inside, k] = 1
+
+    def classify_hsv(self, hsv):
+        total = hsv.shape[0] * hsv.shape[1]
+        if total == 0: return self.default
+        cell = cv2.transform(cv2.LUT(hsv, self.lut), self.channel_sum)
+        counts = cv2.calcHist([cell], [0], None, [self.n_cells], [0, self.n_cells]).ravel() @ self.membership
+
+        best_color = self.default
+        max_pixels = 0
+        for name, count in zip(self.names, counts):
+            if count > max_pixels and (count/total) > self.min_share:
+                max_pixels = count
+                best_color = name
+        return best_color
+
+    def classify(self, crop):
+        """BGR vehicle crop -> color name (uses the same center region as before)."""
+        if crop.size == 0: return self.default
+        h, w, _ = crop.shape
+        # Smart Center Crop
+        center = crop[int(h*0.2):int(h*0.75), int(w*0.25):int(w*0.75)]
+        if center.size == 0: return self.default
+        if self.max_pixels:
+            step = int(np.ceil(np.sqrt(center.shape[0] * center.shape[1] / self.max_pixels)))
+            if step > 1: center = center[::step, ::step]
+        return self.classify_hsv(cv2.cvtColor(center, cv2.COLOR_BGR2HSV))
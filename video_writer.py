@@ -0,0 +1,194 @@
+import os
+import cv2
+import subprocess
+import tempfile
+import logging
+import functools
+
+logger = logging.getLogger(__name__)
+
+@functools.lru_cache(maxsize=None)
+def ffmpeg_encoders(binary="ffmpeg"):
+    """Encoder names the ffmpeg binary supports (empty set if it cannot be run)."""
+    try:
+        listing = subprocess.run([binary, "-hide_banner", "-encoders"], capture_output=True, text=True, timeout=15).stdout
+    except (OSError, subprocess.SubprocessError):
+        return frozenset()
+    names = set()
+    for line in listing.splitlines():
+        parts = line.split()
+        # Encoder lines look like " V....D libvpx-vp9  libvpx VP9 (codec vp9)"
+        if len(parts) >= 2 and len(parts[0]) == 6 and parts[0][0] in "VAS":
+            names.add(parts[1])
+    return frozenset(names)
+
+class FFmpegWriter:
+    """
+    Annotated video writer that pipes raw BGR frames into an ffmpeg process.
+    Same interface as cv2.VideoWriter (write / isOpened / release), so the encoder stage is unchanged.
+    Unlike OpenCV's VP9 path it exposes the encoder speed controls: CRF, libvpx deadline and
+    cpu-used, and thread count (0 = ffmpeg's default).
+    """
+    def __init__(self, path, fps, size, codec="libvpx-vp9", crf=32, deadline="realtime", cpu_used=8, threads=0, binary="ffmpeg"):
+        if codec not in ffmpeg_encoders(binary):
+            raise RuntimeError(f"ffmpeg ({binary}) not available or lacks encoder '{codec}'")
+        w, h = size
+        self.path = path
+        self.frame_bytes = w * h * 3
+        cmd = [binary, "-hide_banner", "-loglevel", "error", "-y",
+               "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{w}x{h}", "-r", str(fps), "-i", "-",
+               "-an", "-c:v", codec, "-pix_fmt", "yuv420p", "-crf", str(crf)]
+        if codec.startswith("libvpx"):
+            # Constant quality (no bitrate target), speed preset, row multithreading for VP9
+            cmd += ["-b:v", "0", "-deadline", deadline, "-cpu-used", str(cpu_used)]
+            if codec == "libvpx-vp9": cmd += ["-row-mt", "1"]
+        if threads: cmd += ["-threads", str(threads)]
+        cmd.append(path)
+
+        self._stderr = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self._stderr)
+        print(f"DEBUG: FFmpeg writer started: {' '.join(cmd)}")
+
+    def isOpened(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def write(self, frame):
+        if frame.nbytes != self.frame_bytes:
+            raise ValueError(f"Frame has {frame.nbytes} bytes, writer expects {self.frame_bytes}")
+        try:
+            self._proc.stdin.write(memoryview(frame).cast("B") if frame.flags.c_contiguous else frame.tobytes())
+        except (BrokenPipeError, ValueError):
+            raise IOError(f"ffmpeg exited while writing {self.path}: {self._error_output()}")
+
+    def release(self):
+        """Closes the pipe and waits for ffmpeg. IOError if it failed, since the file is then truncated or empty."""
+        if self._proc is None: return
+        proc, self._proc = self._proc, None
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        error = self._error_output() if proc.returncode != 0 else None
+        self._stderr.close()
+        if error is not None:
+            raise IOError(f"ffmpeg exited with {proc.returncode} for {self.path}: {error}")
+
+    def _error_output(self):
+        self._stderr.seek(0)
+        return self._stderr.read().decode(errors="replace").strip()[-500:]
+
+def open_video_writer(path, fps, size, settings):
+    """Writer for the annotated video: ffmpeg pipe if configured and available, else VP9, VP8, then mp4v."""
+    if settings["video_writer"] == "ffmpeg":
+        try:
+            return FFmpegWriter(path, fps, size, codec=settings["ffmpeg_codec"], crf=settings["ffmpeg_crf"],
+                                deadline=settings["ffmpeg_deadline"], cpu_used=settings["ffmpeg_cpu_used"],
+                                threads=settings["ffmpeg_threads"], binary=settings["ffmpeg_bin"])
+        except Exception as e:
+            print(f"DEBUG: FFmpeg writer unavailable ({e}), falling back to OpenCV...")
+
+    # CODEC FIX: Use VP9 (WebM) for browser compatibility.
+    try:
+        fourcc = cv2.VideoWriter_fourcc(*'vp09') # VP9
+        out = cv2.VideoWriter(path, fourcc, fps, size)
+        if not out.isOpened():
+            print("DEBUG: VP9 Failed, trying VP8...")
+            fourcc = cv2.VideoWriter_fourcc(*'vp80') # VP8
+            out = cv2.VideoWriter(path, fourcc, fps, size)
+        
+        if not out.isOpened():
+            # Last resort fallback
+            print("DEBUG: VP8 Failed, trying mp4v fallback...")
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(path, fourcc, fps, size)
+    except Exception as e:
+        logger.error(f"VideoWriter Init Failed: {e}")
+        raise e
+    return out
+
+def concat_videos(paths, output_path, settings):
+    """Joins videos end to end (segments, parts): ffmpeg stream copy if available, else decode and re-encode with OpenCV."""
+    paths = [p for p in paths if os.path.exists(p) and os.path.getsize(p) > 0]
+    if not paths: return
+    listing = output_path + ".txt"
+    with open(listing, "w") as f:
+        f.writelines(f"file '{os.path.abspath(p)}'\n" for p in paths)
+    try:
+        subprocess.run([settings["ffmpeg_bin"], "-hide_banner", "-loglevel", "error", "-y", "-f", "concat", "-safe", "0",
+                        "-i", listing, "-c", "copy", output_path], check=True, capture_output=True, timeout=3600)
+        return
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"DEBUG: FFmpeg concat unavailable ({e}), re-encoding with OpenCV...")
+    finally:
+        os.remove(listing)
+
+    out = None
+    try:
+        for path in paths:
+            cap = cv2.VideoCapture(path)
+            while True:
+                ret, frame = cap.read()
+                if not ret: break
+                if out is None:
+                    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+                    out = open_video_writer(output_path, fps, (frame.shape[1], frame.shape[0]), settings)
+                out.write(frame)
+            cap.release()
+    finally:
+        if out is not None: out.release()
+
+class PartedVideoWriter:
+    """
+    Annotated video of a checkpointed job, written as consecutive part files (<name>.part0<ext>, ...).
+    rotate() closes the current part, a complete file on disk, and starts the next one, so a job that
+    resumes from a checkpoint keeps the parts finished up to it. finish() joins the parts into `path`.
+    Same write / isOpened / release interface as the other writers.
+    """
+    def __init__(self, path, fps, size, settings, parts=()):
+        self.path, self.fps, self.size, self.settings = path, fps, size, settings
+        self.parts = list(parts)
+        base, ext = os.path.splitext(path)
+        self._pattern = f"{base}.part{{}}{ext}"
+        # Parts written after the checkpoint we resume from are incomplete
+        directory = os.path.dirname(os.path.abspath(path))
+        prefix = os.path.basename(base) + ".part"
+        keep = {os.path.abspath(p) for p in self.parts}
+        for name in os.listdir(directory):
+            part = os.path.join(directory, name)
+            if name.startswith(prefix) and name.endswith(ext) and part not in keep: os.remove(part)
+        self._out = self._open()
+
+    def _open(self):
+        part = self._pattern.format(len(self.parts))
+        self.parts.append(part)
+        return open_video_writer(part, self.fps, self.size, self.settings)
+
+    def isOpened(self):
+        return self._out.isOpened()
+
+    def write(self, frame):
+        self._out.write(frame)
+
+    def rotate(self):
+        """Finishes the current part and opens the next. Returns the finished parts."""
+        self._out.release()
+        finished = list(self.parts)
+        self._out = self._open()
+        return finished
+
+    def release(self):
+        self._out.release()
+
+    def finish(self):
+        """Joins the parts into the final video and deletes them (call after release())."""
+        if len(self.parts) == 1:
+            os.replace(self.parts[0], self.path)
+        else:
+            concat_videos(self.parts, self.path, self.settings)
+            for part in self.parts:
+                if os.path.exists(part): os.remove(part)